@@ -1,157 +1,467 @@
 from flask import Flask, request, jsonify, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
-from flask_cors import CORS
 from datetime import datetime
 import os
+import time
+import click
 from dotenv import load_dotenv
 
 # 加载环境变量
 load_dotenv()
 
-# 创建Flask应用
-app = Flask(__name__, static_folder='../frontend', static_url_path='')
-
-# 配置数据库
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///warehouse.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-
-# 启用CORS
-CORS(app)
-
-# 创建数据库实例
-db = SQLAlchemy(app)
-
-# 数据库模型
-class ItemCategory(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), unique=True, nullable=False)
-    description = db.Column(db.Text)
-    items = db.relationship('Item', backref='category_obj', lazy=True)
-
-class Item(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(200), nullable=False)
-    category = db.Column(db.String(100), db.ForeignKey('item_category.name'), nullable=False)
-    total = db.Column(db.Integer, default=0)
-    in_stock = db.Column(db.Integer, default=0)
-    description = db.Column(db.Text)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-class Request(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(100), nullable=False)
-    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
-    item_name = db.Column(db.String(200), nullable=False)
-    item_category = db.Column(db.String(100), nullable=False)
-    quantity = db.Column(db.Integer, default=1)
-    purpose = db.Column(db.Text)
-    status = db.Column(db.String(50), default='pending')  # pending, approved, rejected, returned, partially_returned
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    approved_at = db.Column(db.DateTime)
-    approver = db.Column(db.String(100))
-    comment = db.Column(db.Text)
-    returned_quantity = db.Column(db.Integer, default=0)
-    returned_at = db.Column(db.DateTime)
-    item = db.relationship('Item', backref='requests')
-
-# 初始化数据库
-with app.app_context():
-    db.create_all()
-    # 确保默认分类存在
-    if not ItemCategory.query.filter_by(name='未分类').first():
-        default_category = ItemCategory(name='未分类', description='默认分类')
-        db.session.add(default_category)
-        db.session.commit()
-
-# 导入路由
-from routes.items import item_bp
-from routes.requests import request_bp
-from routes.admin import admin_bp
-
-# 注册蓝图
-app.register_blueprint(item_bp, url_prefix='/api/items')
-app.register_blueprint(request_bp, url_prefix='/api/requests')
-app.register_blueprint(admin_bp, url_prefix='/api/admin')
-
-# 静态文件路由
-@app.route('/static/<path:path>')
-def serve_static(path):
-    return send_from_directory('../frontend', path)
-
-# 默认路由，返回前端页面
-@app.route('/')
-def index():
-    return send_from_directory('../frontend', 'index.html')
-
-# 登录验证
-@app.route('/api/login', methods=['POST'])
-def login():
-    data = request.json
-    username = data.get('username')
-    password = data.get('password')
-    
-    # 简单的用户验证（实际应用中应使用更安全的方式）
-    if username == 'admin' and password == 'admin123':
+from utils.routing import build_engine_options, REPLICA_BIND_KEY
+from extensions import db
+
+def configure_app(app, config=None):
+    """从环境变量加载配置，config 中的值优先"""
+    # 配置数据库
+    app.config['SQLALCHEMY_DATABASE_URI'] = _normalize_database_url(os.getenv('DATABASE_URL', 'sqlite:///warehouse.db'))
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+
+    # 连接池配置（PostgreSQL等服务端数据库）：连接数、溢出连接数、
+    # 获取连接超时（秒）、连接回收时间（秒）
+    app.config['DB_POOL_SIZE'] = int(os.getenv('DB_POOL_SIZE', 10))
+    app.config['DB_MAX_OVERFLOW'] = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    app.config['DB_POOL_TIMEOUT'] = int(os.getenv('DB_POOL_TIMEOUT', 30))
+    app.config['DB_POOL_RECYCLE'] = int(os.getenv('DB_POOL_RECYCLE', 1800))
+
+    # 只读副本地址，配置后列表、统计、导出等只读接口的查询发送到副本
+    replica_url = os.getenv('DATABASE_REPLICA_URL')
+    if replica_url:
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND_KEY: _normalize_database_url(replica_url)}
+
+    # SQLite连接参数：WAL模式、写锁等待时间（毫秒）、同步级别、
+    # 内存映射大小（字节）、页缓存大小（负数表示KiB）
+    app.config['SQLITE_JOURNAL_MODE'] = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    app.config['SQLITE_CACHE_SIZE'] = int(os.getenv('SQLITE_CACHE_SIZE', -64000))
+
+    # 日志保留天数，超过的日志会被归档到按月归档表
+    app.config['LOG_RETENTION_DAYS'] = int(os.getenv('LOG_RETENTION_DAYS', 90))
+
+    # 系统设置缓存检查版本号的间隔（秒）
+    app.config['SETTINGS_CHECK_INTERVAL'] = float(os.getenv('SETTINGS_CHECK_INTERVAL', 5))
+
+    # 用户身份缓存有效期（秒），禁用账户最迟在该时间后对其他进程生效
+    app.config['PRINCIPAL_CACHE_TTL'] = float(os.getenv('PRINCIPAL_CACHE_TTL', 30))
+
+    # 密码哈希配置：算法及迭代次数、哈希进程数（0表示在请求线程中同步计算）、
+    # 最大排队数及排队等待时间（秒），超过时直接返回503。
+    # PASSWORD_HASH_WORKERS 是整台机器的哈希进程总数，按 WEB_CONCURRENCY 平分到每个服务进程
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    hash_workers = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+    web_concurrency = max(1, int(os.getenv('WEB_CONCURRENCY', 1)))
+    app.config['PASSWORD_HASH_WORKERS'] = max(1, hash_workers // web_concurrency) if hash_workers > 0 else 0
+    app.config['PASSWORD_HASH_MAX_PENDING'] = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 64))
+    app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 0.5))
+
+    # 申请归档：已归还、已拒绝的申请超过多少天移动到归档表，每批移动的行数
+    app.config['REQUEST_ARCHIVE_DAYS'] = int(os.getenv('REQUEST_ARCHIVE_DAYS', 180))
+    app.config['REQUEST_ARCHIVE_BATCH_SIZE'] = int(os.getenv('REQUEST_ARCHIVE_BATCH_SIZE', 1000))
+
+    # 库存预测：统计窗口（天）、补货提前期（天）、每天重新计算的时刻（小于0不定时）、结果缓存文件
+    app.config['FORECAST_WINDOW_DAYS'] = int(os.getenv('FORECAST_WINDOW_DAYS', 90))
+    app.config['FORECAST_LEAD_DAYS'] = int(os.getenv('FORECAST_LEAD_DAYS', 14))
+    app.config['FORECAST_HOUR'] = int(os.getenv('FORECAST_HOUR', 2))
+    app.config['FORECAST_CACHE_FILE'] = os.getenv('FORECAST_CACHE_FILE', os.path.join(app.root_path, 'forecast_cache.json'))
+
+    # 审计日志写入配置：同步模式（测试用）、队列上限、批量大小、刷新间隔（毫秒）
+    app.config['AUDIT_SYNC'] = os.getenv('AUDIT_SYNC', 'False').lower() == 'true'
+    app.config['AUDIT_QUEUE_SIZE'] = int(os.getenv('AUDIT_QUEUE_SIZE', 10000))
+    app.config['AUDIT_BATCH_SIZE'] = int(os.getenv('AUDIT_BATCH_SIZE', 200))
+    app.config['AUDIT_FLUSH_INTERVAL_MS'] = int(os.getenv('AUDIT_FLUSH_INTERVAL_MS', 200))
+
+    # 数据库快照配置：保存目录、保留个数、定时间隔（小时，0表示不定时）
+    app.config['SNAPSHOT_DIR'] = os.getenv('SNAPSHOT_DIR', os.path.join(app.root_path, 'snapshots'))
+    app.config['SNAPSHOT_KEEP'] = int(os.getenv('SNAPSHOT_KEEP', 7))
+    app.config['SNAPSHOT_INTERVAL_HOURS'] = float(os.getenv('SNAPSHOT_INTERVAL_HOURS', 0))
+
+    # 事件推送：每个进程同时保持的连接数上限（默认为线程数的一半，给普通请求留出线程）、
+    # 单个连接的最长保持时间（秒），到期后浏览器自动重连
+    app.config['EVENT_MAX_STREAMS'] = int(os.getenv('EVENT_MAX_STREAMS', max(1, int(os.getenv('THREADS', 4)) // 2)))
+    app.config['EVENT_STREAM_MAX_AGE'] = int(os.getenv('EVENT_STREAM_MAX_AGE', 300))
+
+    # 是否启用接口耗时统计和 /api/metrics
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+
+    # 开发模式SQL查询统计：是否启用、同一语句执行多少次视为N+1嫌疑
+    app.config['QUERY_DEBUG'] = os.getenv('QUERY_DEBUG', 'False').lower() == 'true'
+    app.config['QUERY_DEBUG_N1_THRESHOLD'] = int(os.getenv('QUERY_DEBUG_N1_THRESHOLD', 5))
+
+    # 按需性能分析：是否启用、随机采样比例（0~1）、保留的分析结果数
+    # 启用后管理员可通过请求头 X-Profile: 1 分析单个请求
+    app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    app.config['PROFILING_SAMPLE_RATE'] = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+    app.config['PROFILING_KEEP'] = int(os.getenv('PROFILING_KEEP', 50))
+
+    # 响应压缩：是否启用、最小压缩大小（字节）、压缩级别
+    app.config['COMPRESS_ENABLED'] = os.getenv('COMPRESS_ENABLED', 'True').lower() == 'true'
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+
+    # 前端源文件目录和静态资源构建目录（flask build-assets 生成）
+    app.config['FRONTEND_DIR'] = os.path.normpath(os.path.join(app.root_path, '..', 'frontend'))
+    app.config['STATIC_BUILD_DIR'] = os.getenv('STATIC_BUILD_DIR', os.path.join(app.config['FRONTEND_DIR'], 'dist'))
+
+    # 接口限流：是否启用、计数后端（memory 为进程内，sqlite 为本机多进程共享）及其文件路径
+    # 各接口的限制在系统设置 rate_limits 中配置
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    app.config['RATE_LIMIT_BACKEND'] = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    app.config['RATE_LIMIT_STORAGE'] = os.getenv('RATE_LIMIT_STORAGE', os.path.join(app.root_path, 'ratelimit.db'))
+
+    # 后台任务：线程数、结果文件目录、已完成任务的保留天数
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 2))
+    app.config['JOB_RESULT_DIR'] = os.getenv('JOB_RESULT_DIR', os.path.join(app.root_path, 'job_results'))
+    app.config['JOB_RESULT_KEEP_DAYS'] = int(os.getenv('JOB_RESULT_KEEP_DAYS', 7))
+
+    if config:
+        app.config.update(config)
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', build_engine_options(app.config))
+
+def _normalize_database_url(url):
+    """兼容 postgres:// 形式的地址（SQLAlchemy 只识别 postgresql://）"""
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def register_blueprints(app):
+    """导入并注册路由，路由模块只在创建应用时才导入"""
+    from routes.items import item_bp
+    from routes.requests import requests_bp
+    from routes.admin import admin_bp
+    from routes.users import user_bp
+    from routes.events import event_bp
+    from routes.notifications import notification_bp
+    from routes.jobs import job_bp
+
+    app.register_blueprint(item_bp, url_prefix='/api/items')
+    app.register_blueprint(requests_bp, url_prefix='/api/requests')
+    app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(user_bp, url_prefix='/api/users')
+    app.register_blueprint(event_bp, url_prefix='/api/events')
+    app.register_blueprint(notification_bp, url_prefix='/api/notifications')
+    app.register_blueprint(job_bp, url_prefix='/api/jobs')
+
+def register_commands(app):
+    """注册命令行命令"""
+
+    # 初始化数据库表结构和默认分类（部署或升级时执行一次）
+    @app.cli.command('init-db')
+    def init_db_command():
+        """创建数据库表、补充新增的列并确保默认分类存在"""
+        from models import ItemCategory
+        from utils.database import add_missing_columns
+        db.create_all()
+        added = add_missing_columns(db.engine, db.metadata)
+        if added:
+            click.echo(f'已补充列: {", ".join(added)}')
+        if not ItemCategory.query.filter_by(name='未分类').first():
+            db.session.add(ItemCategory(name='未分类', description='默认分类'))
+            db.session.commit()
+        if 'item.low_stock' in added:
+            from utils.stock_alerts import rebuild_low_stock
+            rebuild_low_stock()
+        click.echo('数据库初始化完成')
+
+    @app.cli.command('rebuild-low-stock')
+    def rebuild_low_stock_command():
+        """按最低库存重新计算全部物品的低库存标记（直接修改数据库后使用）"""
+        from utils.stock_alerts import rebuild_low_stock
+        count = rebuild_low_stock()
+        click.echo(f'低库存物品: {count} 个')
+
+    # 全量数据转储与恢复
+    @app.cli.command('dump-data')
+    @click.argument('path')
+    @click.option('--tables', default='', help='只导出指定的表，逗号分隔')
+    @click.option('--include-passwords', is_flag=True, help='同时导出用户密码哈希（默认不导出）')
+    def dump_data_command(path, tables, include_passwords):
+        """导出gzip压缩的NDJSON全量转储"""
+        from utils.dump import write_dump
+        table_names = [name for name in tables.split(',') if name]
+        with open(path, 'wb') as f:
+            size = write_dump(f, table_names or None, include_secrets=include_passwords)
+        click.echo(f'转储完成: {path} ({size} 字节)')
+
+    @app.cli.command('restore-data')
+    @click.argument('path')
+    @click.option('--append', is_flag=True, help='保留现有数据，仅追加')
+    def restore_data_command(path, append):
+        """从转储文件恢复数据"""
+        from utils.dump import restore_dump
+        with open(path, 'rb') as f:
+            try:
+                restored, skipped = restore_dump(f, replace=not append)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+        for table_name, count in restored.items():
+            click.echo(f'{table_name}: {count} 行')
+        for table_name, missing in skipped.items():
+            click.echo(f'{table_name}: 已跳过，转储中缺少必填列 {", ".join(missing)}')
+        click.echo(f'恢复完成，共 {sum(restored.values())} 行')
+
+    # 日志归档（可由cron定期执行）
+    @app.cli.command('rollover-logs')
+    @click.option('--days', type=int, default=None, help='保留天数，默认使用 LOG_RETENTION_DAYS')
+    def rollover_logs_command(days):
+        """将超过保留期的日志移动到按月归档表"""
+        from utils.logs import rollover_logs
+        retention_days = days if days is not None else app.config['LOG_RETENTION_DAYS']
+        moved = rollover_logs(retention_days)
+        for table_name, count in moved.items():
+            click.echo(f'{table_name}: {count} 行')
+        click.echo(f'归档完成，共 {sum(moved.values())} 行')
+
+    # 申请归档
+    @app.cli.command('archive-requests')
+    @click.option('--days', type=int, default=None, help='保留天数，默认使用 REQUEST_ARCHIVE_DAYS')
+    def archive_requests_command(days):
+        """将超过保留期的已归还、已拒绝申请移动到归档表"""
+        from utils.archive import archive_requests
+        retention_days = days if days is not None else app.config['REQUEST_ARCHIVE_DAYS']
+        moved = archive_requests(retention_days, app.config['REQUEST_ARCHIVE_BATCH_SIZE'])
+        click.echo(f'归档完成，共 {moved} 条申请')
+
+    # 重新计算库存预测（多进程部署时可由 cron 每晚执行）
+    @app.cli.command('forecast')
+    def forecast_command():
+        """计算各物品的消耗速度、预计售罄时间和建议补货量"""
+        from utils.forecast import refresh_forecast
+        data = refresh_forecast(app)
+        click.echo(f'预测完成，共 {len(data["items"])} 个物品: {app.config["FORECAST_CACHE_FILE"]}')
+
+    # 清理过期的后台任务
+    @app.cli.command('prune-jobs')
+    @click.option('--days', type=int, default=None, help='保留天数，默认使用 JOB_RESULT_KEEP_DAYS')
+    def prune_jobs_command(days):
+        """删除过期的已完成任务及其结果文件"""
+        from utils.jobs import job_runner
+        keep_days = days if days is not None else app.config['JOB_RESULT_KEEP_DAYS']
+        click.echo(f'已删除 {job_runner.prune(keep_days)} 个任务')
+
+    # 构建前端静态资源
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """为静态资源加指纹并生成预压缩文件"""
+        from utils.assets import build_assets
+        manifest = build_assets(app.config['FRONTEND_DIR'], app.config['STATIC_BUILD_DIR'], app.config['COMPRESS_MIN_SIZE'])
+        for path, entry in manifest.items():
+            click.echo(f'{path} -> {entry["path"]} {" ".join(entry["encodings"])}')
+        click.echo(f'构建完成: {app.config["STATIC_BUILD_DIR"]}')
+
+    # 创建数据库在线快照
+    @app.cli.command('snapshot')
+    def snapshot_command():
+        """使用SQLite在线备份API创建快照"""
+        from utils.snapshot import create_snapshot
+        info = create_snapshot(db.engine, app.config['SNAPSHOT_DIR'], app.config['SNAPSHOT_KEEP'])
+        click.echo(f'快照完成: {info["name"]} ({info["size_text"]}, {info["duration"]} 秒)')
+
+def register_handlers(app):
+    """注册请求钩子、基础路由和错误处理"""
+    from utils.settings import settings
+    from utils.assets import StaticAssets
+
+    # 维护模式：除管理接口和登录外，拒绝所有写操作
+    @app.before_request
+    def check_maintenance_mode():
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        if request.path.startswith('/api/admin') or request.path.endswith('/login'):
+            return None
+        if settings.get('maintenance_mode'):
+            return jsonify({
+                'code': 503,
+                'message': '系统维护中，请稍后再试'
+            }), 503
+
+    # 静态文件：已构建时使用加指纹、预压缩的文件
+    assets = StaticAssets(app.config['FRONTEND_DIR'], app.config['STATIC_BUILD_DIR'])
+
+    @app.route('/<path:path>', endpoint='static')
+    def serve_asset(path):
+        return assets.send(path)
+
+    # 静态文件路由
+    @app.route('/static/<path:path>')
+    def serve_static(path):
+        return assets.send(path)
+
+    # 默认路由，返回前端页面
+    @app.route('/')
+    def index():
+        return assets.send('index.html')
+
+    # 登录验证
+    @app.route('/api/login', methods=['POST'])
+    def login():
+        data = request.json
+        username = data.get('username')
+        password = data.get('password')
+
+        # 简单的用户验证（实际应用中应使用更安全的方式）
+        if username == 'admin' and password == 'admin123':
+            return jsonify({
+                'code': 200,
+                'data': {
+                    'username': username,
+                    'role': 'admin'
+                },
+                'message': '登录成功'
+            })
+        elif username == 'user' and password == 'user123':
+            return jsonify({
+                'code': 200,
+                'data': {
+                    'username': username,
+                    'role': 'user'
+                },
+                'message': '登录成功'
+            })
+        else:
+            return jsonify({
+                'code': 401,
+                'message': '用户名或密码错误'
+            })
+
+    # 健康检查
+    @app.route('/api/health')
+    def health():
         return jsonify({
             'code': 200,
             'data': {
-                'username': username,
-                'role': 'admin'
-            },
-            'message': '登录成功'
+                'status': 'ok',
+                'timestamp': datetime.utcnow().isoformat(),
+                'startup_time': app.config.get('STARTUP_TIME')
+            }
         })
-    elif username == 'user' and password == 'user123':
+
+    # 404错误处理
+    @app.errorhandler(404)
+    def not_found(error):
+        # 尝试返回静态文件，如果不存在则返回404
+        if request.path.startswith('/static/'):
+            return send_from_directory(app.config['FRONTEND_DIR'], request.path[8:]), 404
         return jsonify({
-            'code': 200,
-            'data': {
-                'username': username,
-                'role': 'user'
-            },
-            'message': '登录成功'
-        })
-    else:
+            'code': 404,
+            'message': '接口不存在'
+        }), 404
+
+    # 500错误处理
+    @app.errorhandler(500)
+    def internal_error(error):
         return jsonify({
-            'code': 401,
-            'message': '用户名或密码错误'
-        })
+            'code': 500,
+            'message': '服务器内部错误'
+        }), 500
+
+def create_app(config=None):
+    """创建Flask应用
+
+    只做配置和注册，不访问数据库；建表和默认数据由 `flask init-db`
+    或 init_db.py 显式完成，因此工作进程可以快速启动。
+    """
+    started = time.perf_counter()
+
+    # 静态文件由 register_handlers 中的路由提供
+    app = Flask(__name__, static_folder=None)
+    configure_app(app, config)
+
+    # 使用 orjson 序列化响应（未安装时退回标准库）
+    from utils.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
+    # 启用CORS
+    from flask_cors import CORS
+    CORS(app)
 
-# 健康检查
-@app.route('/api/health')
-def health():
-    return jsonify({
-        'code': 200,
-        'data': {
-            'status': 'ok',
-            'timestamp': datetime.utcnow().isoformat()
-        }
-    })
-
-# 404错误处理
-@app.errorhandler(404)
-def not_found(error):
-    # 尝试返回静态文件，如果不存在则返回404
-    if request.path.startswith('/static/'):
-        return send_from_directory('../frontend', request.path[8:]), 404
-    return jsonify({
-        'code': 404,
-        'message': '接口不存在'
-    }), 404
-
-# 500错误处理
-@app.errorhandler(500)
-def internal_error(error):
-    return jsonify({
-        'code': 500,
-        'message': '服务器内部错误'
-    }), 500
+    db.init_app(app)
+    # 注册模型
+    import models  # noqa: F401
+
+    # SQLite连接调优
+    from utils.database import configure_sqlite
+    with app.app_context():
+        configure_sqlite(db.engine, app.config)
+
+    # 响应压缩（after_request 按注册的逆序执行，最先注册以便最后压缩）
+    if app.config['COMPRESS_ENABLED']:
+        from utils.compression import init_compression
+        init_compression(app)
+
+    # 接口耗时统计（最先注册，以便覆盖其他请求钩子的耗时）
+    if app.config['METRICS_ENABLED']:
+        from utils.metrics import init_metrics
+        init_metrics(app, db)
+
+    # SQL查询统计和N+1检测（仅开发时开启）
+    if app.config['QUERY_DEBUG']:
+        from utils.query_debug import init_query_debug
+        init_query_debug(app, db)
+
+    # 按需性能分析（默认关闭，关闭时不注册任何钩子）
+    if app.config['PROFILING_ENABLED']:
+        from utils.profiling import init_profiling
+        init_profiling(app, db)
+
+    # 接口限流（管理员不受限制）
+    if app.config['RATE_LIMIT_ENABLED']:
+        from utils.ratelimit import init_rate_limit
+        init_rate_limit(app)
+
+    register_blueprints(app)
+    register_commands(app)
+    register_handlers(app)
+
+    # 系统设置缓存
+    from utils.settings import settings
+    settings.check_interval = app.config['SETTINGS_CHECK_INTERVAL']
+
+    # 异步审计日志写入
+    from utils.audit import audit_writer
+    audit_writer.init_app(app, db)
+
+    # 后台任务执行器
+    from utils.jobs import job_runner
+    job_runner.init_app(app, db)
+
+    # 事件推送连接限制
+    from utils.events import event_hub
+    event_hub.init_app(app)
+
+    # 库存预测结果缓存
+    from utils.forecast import forecast_cache
+    forecast_cache.init_app(app)
+
+    app.config['STARTUP_TIME'] = round(time.perf_counter() - started, 4)
+    app.logger.info(f'应用初始化完成，耗时 {app.config["STARTUP_TIME"]} 秒')
+    return app
 
 if __name__ == '__main__':
+    from utils.snapshot import start_snapshot_scheduler
+    from utils.forecast import start_forecast_scheduler
+
+    app = create_app()
+
     # 从环境变量获取配置
     host = os.getenv('HOST', '0.0.0.0')
     port = int(os.getenv('PORT', 5001))
     debug = os.getenv('DEBUG', 'True').lower() == 'true'
-    
+    # 服务模式：dev（Flask开发服务器）或 waitress（多线程生产服务器）；
+    # 多进程部署请使用 gunicorn -c gunicorn.conf.py wsgi:app
+    server = os.getenv('SERVER', 'dev').lower()
+
+    # 启动定时快照
+    start_snapshot_scheduler(app, db)
+    # 每晚重新计算库存预测
+    start_forecast_scheduler(app)
+
     # 启动应用
-    app.run(host=host, port=port, debug=debug)
\ No newline at end of file
+    if server == 'waitress':
+        from waitress import serve
+        serve(app, host=host, port=port, threads=int(os.getenv('THREADS', 8)))
+    else:
+        app.run(host=host, port=port, debug=debug, threaded=True)
@@ -1,9 +1,54 @@
+import threading
+import time
+from collections import namedtuple
 from functools import wraps
-from flask import request, jsonify, session
+from flask import request, jsonify, session, current_app
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
-from .app import db
-from .models import User
+from extensions import db
+from models import User
+from utils.serializers import to_dict
+from utils.passwords import hash_password, hash_passwords, verify_password, needs_rehash
+
+# 用户身份缓存：鉴权只需要角色和启用状态，按用户ID短时间缓存，避免每次请求查库
+Principal = namedtuple('Principal', ['id', 'username', 'role', 'is_active'])
+
+_principal_cache = {}
+_principal_lock = threading.Lock()
+
+def get_principal(user_id):
+    """获取用户身份（带TTL缓存），用户不存在时返回None"""
+    if user_id is None:
+        return None
+    
+    now = time.monotonic()
+    entry = _principal_cache.get(user_id)
+    if entry and entry[1] > now:
+        return entry[0]
+    
+    user = User.query.get(user_id)
+    principal = Principal(user.id, user.username, user.role, user.is_active) if user else None
+    ttl = current_app.config.get('PRINCIPAL_CACHE_TTL', 30)
+    with _principal_lock:
+        _principal_cache[user_id] = (principal, now + ttl)
+    return principal
+
+def invalidate_principal(user_id=None):
+    """清除用户身份缓存，不指定用户ID时清空全部"""
+    with _principal_lock:
+        if user_id is None:
+            _principal_cache.clear()
+        else:
+            _principal_cache.pop(user_id, None)
+
+def get_session_principal():
+    """获取当前会话用户的身份"""
+    if 'username' not in session:
+        return None
+    if 'user_id' in session:
+        return get_principal(session['user_id'])
+    # 旧会话中没有用户ID，回退到按用户名查询
+    user = User.query.filter_by(username=session['username']).first()
+    return get_principal(user.id) if user else None
 
 def login_required(f):
     """登录装饰器"""
@@ -14,6 +59,13 @@ def login_required(f):
                 'code': 401,
                 'message': '请先登录'
             })
+        
+        principal = get_session_principal()
+        if not principal or not principal.is_active:
+            return jsonify({
+                'code': 401,
+                'message': '账户不存在或已被禁用'
+            })
         return f(*args, **kwargs)
     return decorated_function
 
@@ -27,8 +79,8 @@ def admin_required(f):
                 'message': '请先登录'
             })
         
-        user = User.query.filter_by(username=session['username']).first()
-        if not user or user.role != 'admin':
+        principal = get_session_principal()
+        if not principal or not principal.is_active or principal.role != 'admin':
             return jsonify({
                 'code': 403,
                 'message': '没有管理员权限'
@@ -45,9 +97,13 @@ def authenticate_user(username, password):
     if not user.is_active:
         return None, False, "账户已被禁用"
     
-    if not check_password_hash(user.password, password):
+    if not verify_password(user.password, password):
         return None, False, "密码错误"
     
+    # 哈希参数变更后，登录时透明地用新参数重新哈希（由 login 提交）
+    if needs_rehash(user.password):
+        user.password = hash_password(password)
+    
     return user, True, "验证成功"
 
 def login(username, password):
@@ -81,13 +137,14 @@ def change_password(user_id, old_password, new_password):
         return False, "用户不存在"
     
     # 验证旧密码
-    if not check_password_hash(user.password, old_password):
+    if not verify_password(user.password, old_password):
         return False, "原密码错误"
     
     # 更新密码
-    user.password = generate_password_hash(new_password)
+    user.password = hash_password(new_password)
     user.updated_at = datetime.utcnow()
     db.session.commit()
+    invalidate_principal(user_id)
     
     return True, "密码修改成功"
 
@@ -139,7 +196,7 @@ def create_user(username, password, role='user', department=None, phone=None, em
     # 创建新用户
     new_user = User(
         username=username,
-        password=generate_password_hash(password),
+        password=hash_password(password),
         role=role,
         department=department,
         phone=phone,
@@ -151,6 +208,82 @@ def create_user(username, password, role='user', department=None, phone=None, em
     
     return True, "用户创建成功"
 
+# 批量创建用户时每批插入/查询的行数
+BULK_USER_CHUNK_SIZE = 500
+
+def bulk_create_users(rows):
+    """批量创建用户(管理员用)
+    
+    rows 为字典列表，字段同 create_user。一次查询检查已存在的用户名，
+    并行计算密码哈希，再按块批量插入。返回 (创建的用户名列表, 错误列表)。
+    """
+    errors = []
+    candidates = []
+    seen = set()
+    
+    for idx, row in enumerate(rows):
+        username = (row.get('username') or '').strip()
+        password = row.get('password') or ''
+        role = row.get('role') or 'user'
+        if not username or not password:
+            errors.append(f'第{idx+1}行：用户名和密码不能为空')
+            continue
+        if len(password) < 6:
+            errors.append(f'第{idx+1}行：密码长度至少为6位')
+            continue
+        if role not in ('user', 'admin'):
+            errors.append(f'第{idx+1}行：角色无效')
+            continue
+        if username in seen:
+            errors.append(f'第{idx+1}行：用户名 {username} 重复')
+            continue
+        seen.add(username)
+        candidates.append((idx, username, password, role, row))
+    
+    # 检查已存在的用户名
+    existing = set()
+    names = [candidate[1] for candidate in candidates]
+    for start in range(0, len(names), BULK_USER_CHUNK_SIZE):
+        chunk = names[start:start + BULK_USER_CHUNK_SIZE]
+        existing.update(name for (name,) in db.session.query(User.username).filter(User.username.in_(chunk)))
+    
+    new_users = []
+    for idx, username, password, role, row in candidates:
+        if username in existing:
+            errors.append(f'第{idx+1}行：用户名 {username} 已存在')
+            continue
+        new_users.append((username, password, role, row))
+    
+    if not new_users:
+        return [], errors
+    
+    hashes = hash_passwords([password for _, password, _, _ in new_users])
+    now = datetime.utcnow()
+    records = [
+        {
+            'username': username,
+            'password': password_hash,
+            'role': role,
+            'department': row.get('department') or None,
+            'phone': row.get('phone') or None,
+            'email': row.get('email') or None,
+            'created_at': now,
+            'updated_at': now,
+            'is_active': True
+        }
+        for (username, _, role, row), password_hash in zip(new_users, hashes)
+    ]
+    
+    try:
+        for start in range(0, len(records), BULK_USER_CHUNK_SIZE):
+            db.session.execute(User.__table__.insert(), records[start:start + BULK_USER_CHUNK_SIZE])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    
+    return [record['username'] for record in records], errors
+
 def update_user(user_id, data):
     """更新用户(管理员用)"""
     user = User.query.get(user_id)
@@ -188,10 +321,11 @@ def update_user(user_id, data):
         user.is_active = data['is_active']
     
     if 'password' in data and data['password']:
-        user.password = generate_password_hash(data['password'])
+        user.password = hash_password(data['password'])
     
     user.updated_at = datetime.utcnow()
     db.session.commit()
+    invalidate_principal(user_id)
     
     return True, "用户信息更新成功"
 
@@ -213,23 +347,45 @@ def delete_user(user_id):
     
     db.session.delete(user)
     db.session.commit()
+    invalidate_principal(user_id)
     
     return True, "用户删除成功"
 
-def get_all_users():
-    """获取所有用户(管理员用)"""
-    users = User.query.all()
-    return [
-        {
-            'id': user.id,
-            'username': user.username,
-            'role': user.role,
-            'department': user.department,
-            'phone': user.phone,
-            'email': user.email,
-            'created_at': user.created_at.isoformat() if user.created_at else None,
-            'last_login': user.last_login.isoformat() if user.last_login else None,
-            'is_active': user.is_active
-        }
-        for user in users
-    ]
\ No newline at end of file
+# 用户目录可返回的字段，不包含密码
+USER_DIRECTORY_FIELDS = ('id', 'username', 'role', 'department', 'phone', 'email', 'created_at', 'last_login', 'is_active')
+
+def search_users(prefix=None, department=None, role=None, is_active=None, cursor=None, limit=50, fields=None):
+    """搜索用户(管理员用)
+    
+    按用户名排序，以上一页最后一个用户名作为游标进行键集分页；
+    用户名前缀使用范围条件以便走索引。fields 指定只返回的字段。
+    返回 (用户列表, 下一页游标)。
+    """
+    fields = [field for field in (fields or USER_DIRECTORY_FIELDS) if field in USER_DIRECTORY_FIELDS]
+    if 'username' not in fields:
+        fields.append('username')
+    limit = max(1, min(int(limit), 500))
+    
+    query = db.session.query(*[getattr(User, field) for field in fields])
+    
+    if prefix:
+        query = query.filter(User.username >= prefix, User.username < prefix + '\uffff')
+    if department:
+        query = query.filter(User.department == department)
+    if role:
+        query = query.filter(User.role == role)
+    if is_active is not None:
+        query = query.filter(User.is_active == is_active)
+    if cursor:
+        query = query.filter(User.username > cursor)
+    
+    rows = query.order_by(User.username).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].username
+    
+    users = [to_dict(row, fields) for row in rows]
+    
+    return users, next_cursor
@@ -0,0 +1,257 @@
+import argparse
+import json
+import math
+import random
+import resource
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+
+# 场景及默认权重：模拟真实流量中读多写少的比例
+DEFAULT_WEIGHTS = {
+    'items_list': 30,
+    'items_search': 30,
+    'request_lifecycle': 25,
+    'statistics': 10,
+    'export': 5,
+}
+
+SEARCH_KEYWORDS = ['物品00', '物品01', '物品12', '物品345', '压测物品 9']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='仓库管理系统压力测试')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5001', help='被测服务地址')
+    parser.add_argument('--concurrency', type=int, default=16, help='并发客户端数量')
+    parser.add_argument('--duration', type=float, default=60, help='测试时长（秒）')
+    parser.add_argument('--warmup', type=float, default=5, help='预热时长（秒），不计入结果')
+    parser.add_argument('--username', default='bench000001', help='登录用户名（需要管理员权限）')
+    parser.add_argument('--password', default='bench123', help='登录密码')
+    parser.add_argument('--items', type=int, default=500000, help='物品ID上限，与 seed_data.py 保持一致')
+    parser.add_argument('--categories', type=int, default=2000, help='分类数量，与 seed_data.py 保持一致')
+    parser.add_argument('--scenarios', default=','.join(f'{k}={v}' for k, v in DEFAULT_WEIGHTS.items()),
+                        help='场景及权重，如 items_list=3,statistics=1')
+    parser.add_argument('--server-pid', type=int, help='被测服务进程ID，用于记录服务端内存峰值（仅Linux）')
+    parser.add_argument('--timeout', type=float, default=120, help='单个请求超时（秒）')
+    parser.add_argument('--seed', type=int, default=None, help='随机数种子')
+    parser.add_argument('--output', default='benchmark_results.json', help='结果输出文件')
+    return parser.parse_args()
+
+
+class Recorder:
+    """记录每个操作的耗时和结果"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.recording = False
+
+    def record(self, operation, elapsed, ok):
+        if not self.recording:
+            return
+        with self.lock:
+            self.latencies[operation].append(elapsed)
+            if not ok:
+                self.errors[operation] += 1
+
+
+class Client:
+    """单个压测客户端，持有独立的登录会话"""
+
+    def __init__(self, args, recorder, rng):
+        self.args = args
+        self.recorder = recorder
+        self.rng = rng
+        self.session = requests.Session()
+        self.login()
+
+    def login(self):
+        response = self.session.post(
+            f'{self.args.base_url}/api/users/login',
+            json={'username': self.args.username, 'password': self.args.password},
+            timeout=self.args.timeout
+        )
+        if response.json().get('code') != 200:
+            raise RuntimeError(f'登录失败: {response.text[:200]}')
+
+    def call(self, operation, method, path, **kwargs):
+        """发送请求并记录耗时，响应体读取完毕才算结束"""
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f'{self.args.base_url}{path}',
+                                            timeout=self.args.timeout, **kwargs)
+            content = response.content
+            ok = response.status_code < 400
+            data = None
+            if ok and response.headers.get('Content-Type', '').startswith('application/json'):
+                data = json.loads(content)
+                ok = data.get('code', 200) == 200
+        except requests.RequestException:
+            ok, data = False, None
+        self.recorder.record(operation, time.perf_counter() - started, ok)
+        return ok, data
+
+    def items_list(self):
+        category = f'分类{self.rng.randint(1, self.args.categories - 1):05d}'
+        self.call('items_list', 'GET', '/api/items/', params={'category': category, 'status': 'in_stock'})
+
+    def items_search(self):
+        self.call('items_search', 'GET', '/api/items/', params={'keyword': self.rng.choice(SEARCH_KEYWORDS)})
+
+    def request_lifecycle(self):
+        """创建申请 → 审批 → 归还"""
+        ok, data = self.call('request_create', 'POST', '/api/requests/', json={
+            'username': self.args.username,
+            'item_id': self.rng.randint(1, self.args.items),
+            'quantity': 1,
+            'purpose': '压力测试'
+        })
+        if not ok or not data:
+            return
+        request_id = data['data']['id']
+        ok, _ = self.call('request_approve', 'PUT', f'/api/requests/{request_id}/approve',
+                          json={'approver': self.args.username})
+        if ok:
+            self.call('request_return', 'PUT', f'/api/requests/{request_id}/return', json={'quantity': 1})
+
+    def statistics(self):
+        self.call('statistics', 'GET', '/api/admin/statistics')
+
+    def export(self):
+        self.call('export', 'GET', '/api/admin/export_data', params={'type': self.rng.choice(['items', 'requests'])})
+
+
+def parse_weights(spec):
+    weights = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_WEIGHTS:
+            raise ValueError(f'未知场景: {name}')
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values, p):
+    """最近秩法计算百分位数"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, elapsed):
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        'count': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0,
+        'throughput': round(count / elapsed, 2),
+        'mean_ms': round(sum(values) / count * 1000, 2) if count else None,
+        'p50_ms': round(percentile(values, 50) * 1000, 2) if count else None,
+        'p95_ms': round(percentile(values, 95) * 1000, 2) if count else None,
+        'p99_ms': round(percentile(values, 99) * 1000, 2) if count else None,
+        'max_ms': round(values[-1] * 1000, 2) if count else None,
+    }
+
+
+def server_peak_memory_kb(pid):
+    """读取进程的内存峰值（VmHWM），非Linux或进程不存在时返回None"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def worker(args, recorder, weights, deadline, index):
+    rng = random.Random(None if args.seed is None else args.seed + index)
+    client = Client(args, recorder, rng)
+    names = list(weights)
+    values = [weights[name] for name in names]
+    while time.monotonic() < deadline:
+        getattr(client, rng.choices(names, values)[0])()
+
+
+def run(args):
+    weights = parse_weights(args.scenarios)
+    recorder = Recorder()
+    started_at = datetime.now().isoformat()
+
+    started = time.monotonic()
+    measure_start = started + args.warmup
+    deadline = measure_start + args.duration
+
+    def start_recording():
+        recorder.recording = True
+    timer = threading.Timer(args.warmup, start_recording)
+    timer.start()
+
+    print(f'压测开始: {args.concurrency} 个并发客户端，预热 {args.warmup} 秒，测试 {args.duration} 秒')
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(worker, args, recorder, weights, deadline, i) for i in range(args.concurrency)]
+        for future in futures:
+            future.result()
+    timer.cancel()
+    elapsed = time.monotonic() - measure_start
+
+    operations = {
+        operation: summarize(values, recorder.errors[operation], elapsed)
+        for operation, values in sorted(recorder.latencies.items())
+    }
+    all_latencies = [value for values in recorder.latencies.values() for value in values]
+    return {
+        'started_at': started_at,
+        'config': {
+            'base_url': args.base_url,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'scenarios': weights,
+        },
+        'elapsed': round(elapsed, 2),
+        'total': summarize(all_latencies, sum(recorder.errors.values()), elapsed),
+        'operations': operations,
+        'memory': {
+            # Linux 下 ru_maxrss 单位为KB
+            'client_peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            'server_peak_kb': server_peak_memory_kb(args.server_pid) if args.server_pid else None,
+        },
+    }
+
+
+def print_report(result):
+    print(f'{"操作":<20}{"次数":>8}{"错误":>6}{"吞吐/秒":>10}{"p50":>10}{"p95":>10}{"p99":>10}')
+    rows = list(result['operations'].items()) + [('total', result['total'])]
+    for operation, stats in rows:
+        print(f'{operation:<20}{stats["count"]:>8}{stats["errors"]:>6}{stats["throughput"]:>10}'
+              f'{stats["p50_ms"] or "-":>10}{stats["p95_ms"] or "-":>10}{stats["p99_ms"] or "-":>10}')
+    memory = result['memory']
+    print(f'客户端内存峰值: {memory["client_peak_kb"]} KB，服务端内存峰值: {memory["server_peak_kb"] or "-"} KB')
+
+
+def main():
+    args = parse_args()
+    try:
+        result = run(args)
+    except Exception as e:
+        print(f'压测失败: {str(e)}')
+        sys.exit(1)
+
+    print_report(result)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f'结果已写入 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+from flask_sqlalchemy import SQLAlchemy
+from utils.routing import RoutingSession
+
+# 数据库实例，在 create_app 中绑定应用；会话支持读写分离。
+# 单独成模块，避免 `python app.py` 时 app.py 被加载两次而创建两个实例
+db = SQLAlchemy(session_options={'class_': RoutingSession})
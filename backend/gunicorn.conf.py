@@ -0,0 +1,24 @@
+import multiprocessing
+import os
+
+# 监听地址
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 5001)}"
+
+# 工作进程数默认为 CPU核数*2+1；每个进程内的线程数
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('THREADS', 4))
+worker_class = 'gthread'
+
+# SSE长连接需要较长的超时时间
+timeout = int(os.getenv('WORKER_TIMEOUT', 120))
+keepalive = 5
+
+# 每个工作进程在fork后各自创建应用（数据库连接、后台线程、哈希进程池）
+preload_app = False
+
+# 定期重启工作进程，避免内存持续增长
+max_requests = int(os.getenv('MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('MAX_REQUESTS_JITTER', 1000))
+
+accesslog = '-'
+errorlog = '-'
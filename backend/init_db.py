@@ -1,6 +1,7 @@
 import os
 import sys
-from app import create_app, db
+from app import create_app
+from extensions import db
 from models import ItemCategory, Item, Request, User, SystemConfig, Log, Notification
 from werkzeug.security import generate_password_hash
 
@@ -1,11 +1,13 @@
 from datetime import datetime
-from .app import db
+from extensions import db
 
 class ItemCategory(db.Model):
     """物品分类模型"""
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(100), unique=True, nullable=False, index=True)
     description = db.Column(db.Text)
+    # 分类下物品的默认最低库存，物品未单独设置时使用；0 表示不提醒
+    default_min_stock = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
@@ -13,11 +15,20 @@ class ItemCategory(db.Model):
 
 class Item(db.Model):
     """物品模型"""
+    # 低库存列表只扫描 low_stock 为真的索引范围，按当前库存排序
+    __table_args__ = (
+        db.Index('ix_item_low_stock_in_stock', 'low_stock', 'in_stock'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(200), nullable=False, index=True)
     category = db.Column(db.String(100), nullable=False, default='未分类', index=True)
     total = db.Column(db.Integer, nullable=False, default=0)
     in_stock = db.Column(db.Integer, nullable=False, default=0)
+    # 最低库存，为空时使用分类的默认值
+    min_stock = db.Column(db.Integer, nullable=True)
+    # 当前库存是否低于最低库存，库存变化时增量维护
+    low_stock = db.Column(db.Boolean, nullable=False, default=False)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -50,8 +61,43 @@ class Request(db.Model):
     def __repr__(self):
         return f'<Request {self.id} - {self.username} - {self.item_name}>'
 
+class RequestArchive(db.Model):
+    """已归档的申请（冷数据），字段与 Request 相同，由归档任务从 Request 移入"""
+    __tablename__ = 'request_archive'
+    __table_args__ = (
+        db.Index('ix_request_archive_username_created', 'username', 'created_at'),
+        db.Index('ix_request_archive_status_created', 'status', 'created_at'),
+        db.Index('ix_request_archive_created', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # 保留原申请ID
+    username = db.Column(db.String(100), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False, index=True)
+    item_name = db.Column(db.String(200), nullable=False)
+    item_category = db.Column(db.String(100), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=1)
+    purpose = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(50), nullable=False)
+    created_at = db.Column(db.DateTime)
+    approved_at = db.Column(db.DateTime, nullable=True)
+    approver = db.Column(db.String(100), nullable=True)
+    comment = db.Column(db.Text)
+    returned_quantity = db.Column(db.Integer, default=0)
+    returned_at = db.Column(db.DateTime, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RequestArchive {self.id} - {self.username} - {self.item_name}>'
+
 class User(db.Model):
     """用户模型"""
+    # 用户目录按用户名排序分页，复合索引支持各筛选条件下的有序扫描
+    __table_args__ = (
+        db.Index('ix_user_department_username', 'department', 'username'),
+        db.Index('ix_user_role_username', 'role', 'username'),
+        db.Index('ix_user_active_username', 'is_active', 'username'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     username = db.Column(db.String(100), unique=True, nullable=False, index=True)
     password = db.Column(db.String(200), nullable=False)
@@ -69,16 +115,24 @@ class User(db.Model):
 
 class Log(db.Model):
     """系统日志模型"""
+    # 复合索引支持按 (created_at, id) 的键集分页，以及各筛选条件下的分页
+    __table_args__ = (
+        db.Index('ix_log_created_id', 'created_at', 'id'),
+        db.Index('ix_log_username_created_id', 'username', 'created_at', 'id'),
+        db.Index('ix_log_action_created_id', 'action', 'created_at', 'id'),
+        db.Index('ix_log_target_created_id', 'target_type', 'target_id', 'created_at', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, nullable=True)
-    username = db.Column(db.String(100), nullable=True, index=True)
+    username = db.Column(db.String(100), nullable=True)
     action = db.Column(db.String(200), nullable=False)  # 操作类型
     target_type = db.Column(db.String(50), nullable=True)  # 目标类型：item, request, user等
     target_id = db.Column(db.Integer, nullable=True)
     details = db.Column(db.Text)  # 操作详情
     ip_address = db.Column(db.String(50), nullable=True)
     user_agent = db.Column(db.String(255), nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
         return f'<Log {self.id} - {self.username} - {self.action}>'
@@ -96,9 +150,15 @@ class SystemConfig(db.Model):
 
 class Notification(db.Model):
     """通知模型"""
+    # 复合索引支持按用户的键集分页和未读筛选
+    __table_args__ = (
+        db.Index('ix_notification_username_id', 'username', 'id'),
+        db.Index('ix_notification_username_read_id', 'username', 'is_read', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, nullable=True)
-    username = db.Column(db.String(100), nullable=False, index=True)
+    username = db.Column(db.String(100), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     type = db.Column(db.String(50), nullable=False)  # system, request, approval等
@@ -106,4 +166,36 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     def __repr__(self):
-        return f'<Notification {self.id} - {self.username} - {self.title}>'
\ No newline at end of file
+        return f'<Notification {self.id} - {self.username} - {self.title}>'
+
+class NotificationCounter(db.Model):
+    """用户未读通知计数，随通知写入和已读操作同步维护"""
+    username = db.Column(db.String(100), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<NotificationCounter {self.username} - {self.unread}>'
+
+class Job(db.Model):
+    """后台任务模型，记录任务状态、进度和结果"""
+    __table_args__ = (
+        db.Index('ix_job_username_id', 'username', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    type = db.Column(db.String(100), nullable=False)  # 任务类型，如 admin.export_data
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending, running, succeeded, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    message = db.Column(db.String(255), nullable=True)
+    params = db.Column(db.Text, nullable=True)  # JSON
+    result = db.Column(db.Text, nullable=True)  # JSON
+    result_file = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    username = db.Column(db.String(100), nullable=True)
+    worker = db.Column(db.String(100), nullable=True)  # 执行任务的 主机名:进程号
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<Job {self.id} - {self.type} - {self.status}>'
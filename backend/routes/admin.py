@@ -1,72 +1,96 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app, session, g
 from datetime import datetime
-from ..app import db
-from ..models import Item, Request, ItemCategory
+from extensions import db
+from auth import admin_required
+from models import Item, Request, RequestArchive, ItemCategory
+from utils.routing import read_only
+from utils.serializers import item_rows, category_rows, iter_rows, ITEM_FIELDS, REQUEST_FIELDS, CATEGORY_FIELDS
+from utils.dump import iter_dump, restore_dump
+from utils.events import event_hub, publish_request_event, publish_stock_event, ITEM_STOCK_CHANGED, REQUEST_APPROVED, REQUEST_REJECTED
+from utils.logs import query_logs, serialize_log, rollover_logs, list_archive_tables
+from utils.settings import settings, parse_value
+from utils.ratelimit import parse_rate
+from utils.snapshot import create_snapshot, list_snapshots
+from utils.notifications import notify_request_changes
+from utils.stock_alerts import check_stock_level, parse_min_stock
+from utils.profiling import get_profiles, get_profile
+from utils.jobs import job_runner, wants_async, job_submitted
+from utils.archive import archive_requests, archived_status_counts, query_request_history
+from utils.forecast import forecast_cache, refresh_forecast
 
 admin_bp = Blueprint('admin', __name__)
 
-# 获取系统统计信息
+def compute_statistics():
+    """计算系统统计信息"""
+    # 统计物品数量
+    total_items = Item.query.count()
+    
+    # 统计总库存和当前库存
+    all_items = Item.query.all()
+    total_stock = sum(item.total for item in all_items)
+    current_stock = sum(item.in_stock for item in all_items)
+    
+    # 统计各类请求数量（已拒绝和已归还包含归档的申请）
+    archived_counts = archived_status_counts()
+    pending_requests = Request.query.filter_by(status='pending').count()
+    approved_requests = Request.query.filter_by(status='approved').count()
+    rejected_requests = Request.query.filter_by(status='rejected').count() + archived_counts.get('rejected', 0)
+    returned_requests = Request.query.filter_by(status='returned').count() + archived_counts.get('returned', 0)
+    partial_requests = Request.query.filter_by(status='partially_returned').count()
+    
+    # 获取最近7天的请求趋势
+    from datetime import datetime, timedelta
+    today = datetime.utcnow()
+    weekly_trend = []
+    
+    for i in range(7):
+        date = today - timedelta(days=i)
+        date_str = date.strftime('%Y-%m-%d')
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = date.replace(hour=23, minute=59, second=59, microsecond=999999)
+        
+        count = Request.query.filter(Request.created_at >= day_start, Request.created_at <= day_end).count()
+        weekly_trend.append({
+            'date': date_str,
+            'count': count
+        })
+    
+    # 按类别统计物品数量
+    category_stats = []
+    categories = ItemCategory.query.all()
+    for category in categories:
+        item_count = Item.query.filter_by(category=category.name).count()
+        category_stats.append({
+            'name': category.name,
+            'count': item_count
+        })
+    
+    return {
+        'total_items': total_items,
+        'total_stock': total_stock,
+        'current_stock': current_stock,
+        'request_stats': {
+            'pending': pending_requests,
+            'approved': approved_requests,
+            'rejected': rejected_requests,
+            'returned': returned_requests,
+            'partially_returned': partial_requests
+        },
+        'weekly_trend': weekly_trend,
+        'category_stats': category_stats
+    }
+
+# 获取系统统计信息（async=1 时作为后台任务执行）
 @admin_bp.route('/statistics', methods=['GET'])
+@read_only
 def get_statistics():
     try:
-        # 统计物品数量
-        total_items = Item.query.count()
-        
-        # 统计总库存和当前库存
-        all_items = Item.query.all()
-        total_stock = sum(item.total for item in all_items)
-        current_stock = sum(item.in_stock for item in all_items)
-        
-        # 统计各类请求数量
-        pending_requests = Request.query.filter_by(status='pending').count()
-        approved_requests = Request.query.filter_by(status='approved').count()
-        rejected_requests = Request.query.filter_by(status='rejected').count()
-        returned_requests = Request.query.filter_by(status='returned').count()
-        partial_requests = Request.query.filter_by(status='partially_returned').count()
-        
-        # 获取最近7天的请求趋势
-        from datetime import datetime, timedelta
-        today = datetime.utcnow()
-        weekly_trend = []
-        
-        for i in range(7):
-            date = today - timedelta(days=i)
-            date_str = date.strftime('%Y-%m-%d')
-            day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = date.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            count = Request.query.filter(Request.created_at >= day_start, Request.created_at <= day_end).count()
-            weekly_trend.append({
-                'date': date_str,
-                'count': count
-            })
-        
-        # 按类别统计物品数量
-        category_stats = []
-        categories = ItemCategory.query.all()
-        for category in categories:
-            item_count = Item.query.filter_by(category=category.name).count()
-            category_stats.append({
-                'name': category.name,
-                'count': item_count
-            })
+        if wants_async():
+            return job_submitted(job_runner.submit('admin.statistics', username=session.get('username')))
         
         return jsonify({
             'code': 200,
-            'data': {
-                'total_items': total_items,
-                'total_stock': total_stock,
-                'current_stock': current_stock,
-                'request_stats': {
-                    'pending': pending_requests,
-                    'approved': approved_requests,
-                    'rejected': rejected_requests,
-                    'returned': returned_requests,
-                    'partially_returned': partial_requests
-                },
-                'weekly_trend': weekly_trend,
-                'category_stats': category_stats
-            },
+            'data': compute_statistics(),
             'message': '获取统计信息成功'
         })
     except Exception as e:
@@ -76,7 +100,64 @@ def get_statistics():
             'message': '获取统计信息失败'
         })
 
-# 批量更新物品信息
+@job_runner.job('admin.statistics')
+def statistics_job(job):
+    # 统计只读，与接口一样使用只读副本
+    g.use_read_replica = True
+    return compute_statistics()
+
+# 后台任务中每处理多少个物品提交一次并更新进度
+BATCH_JOB_CHUNK_SIZE = 500
+
+def apply_batch_update(items_to_update, job=None):
+    """批量更新物品，返回更新数量
+
+    在后台任务中执行时按块提交并报告进度；同步执行时在一个事务中完成。
+    """
+    updated_count = 0
+    updated_items = []
+    for index, item_data in enumerate(items_to_update):
+        item_id = item_data.get('id')
+        item = Item.query.get(item_id) if item_id else None
+        if item:
+            # 更新物品信息
+            if 'name' in item_data:
+                item.name = item_data['name']
+            if 'category' in item_data:
+                # 确保分类存在
+                category = ItemCategory.query.filter_by(name=item_data['category']).first()
+                if not category:
+                    category = ItemCategory(name=item_data['category'], description='自动创建的分类')
+                    db.session.add(category)
+                item.category = item_data['category']
+            if 'total' in item_data:
+                item.total = int(item_data['total'])
+            if 'in_stock' in item_data:
+                item.in_stock = int(item_data['in_stock'])
+            if 'min_stock' in item_data:
+                # 为空时恢复使用分类默认值
+                item.min_stock = parse_min_stock(item_data['min_stock'])
+            if 'description' in item_data:
+                item.description = item_data['description']
+            
+            item.updated_at = datetime.utcnow()
+            check_stock_level(item)
+            updated_items.append(item)
+            updated_count += 1
+        
+        if job and (index + 1) % BATCH_JOB_CHUNK_SIZE == 0:
+            db.session.commit()
+            for updated in updated_items:
+                publish_stock_event(updated)
+            updated_items = []
+            job.progress(index + 1, len(items_to_update), f'已处理 {index + 1} 个物品')
+    
+    db.session.commit()
+    for item in updated_items:
+        publish_stock_event(item)
+    return updated_count
+
+# 批量更新物品信息（async=1 时作为后台任务执行）
 @admin_bp.route('/items/batch_update', methods=['POST'])
 def batch_update_items():
     try:
@@ -89,35 +170,14 @@ def batch_update_items():
                 'message': '请提供要更新的物品信息'
             })
         
-        updated_count = 0
-        for item_data in items_to_update:
-            item_id = item_data.get('id')
-            if not item_id:
-                continue
-            
-            item = Item.query.get(item_id)
-            if item:
-                # 更新物品信息
-                if 'name' in item_data:
-                    item.name = item_data['name']
-                if 'category' in item_data:
-                    # 确保分类存在
-                    category = ItemCategory.query.filter_by(name=item_data['category']).first()
-                    if not category:
-                        category = ItemCategory(name=item_data['category'], description='自动创建的分类')
-                        db.session.add(category)
-                    item.category = item_data['category']
-                if 'total' in item_data:
-                    item.total = int(item_data['total'])
-                if 'in_stock' in item_data:
-                    item.in_stock = int(item_data['in_stock'])
-                if 'description' in item_data:
-                    item.description = item_data['description']
-                
-                item.updated_at = datetime.utcnow()
-                updated_count += 1
+        if wants_async():
+            return job_submitted(job_runner.submit(
+                'admin.batch_update_items',
+                {'items_to_update': items_to_update},
+                username=session.get('username')
+            ))
         
-        db.session.commit()
+        updated_count = apply_batch_update(items_to_update)
         
         return jsonify({
             'code': 200,
@@ -126,6 +186,12 @@ def batch_update_items():
             },
             'message': f'成功更新 {updated_count} 个物品'
         })
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'code': 400,
+            'message': str(e)
+        })
     except Exception as e:
         db.session.rollback()
         print(f'批量更新物品失败: {str(e)}')
@@ -134,6 +200,10 @@ def batch_update_items():
             'message': '批量更新物品失败'
         })
 
+@job_runner.job('admin.batch_update_items')
+def batch_update_job(job, items_to_update):
+    return {'updated_count': apply_batch_update(items_to_update, job)}
+
 # 批量删除物品
 @admin_bp.route('/items/batch_delete', methods=['POST'])
 def batch_delete_items():
@@ -163,6 +233,8 @@ def batch_delete_items():
         # 执行删除
         deleted_count = Item.query.filter(Item.id.in_(item_ids)).delete(synchronize_session=False)
         db.session.commit()
+        for item_id in item_ids:
+            event_hub.publish(ITEM_STOCK_CHANGED, {'id': item_id, 'deleted': True})
         
         return jsonify({
             'code': 200,
@@ -196,6 +268,7 @@ def batch_process_requests():
             })
         
         processed_count = 0
+        processed = []
         for request_id in request_ids:
             req = Request.query.get(request_id)
             if req and req.status == 'pending':
@@ -212,7 +285,9 @@ def batch_process_requests():
                         # 减少库存
                         item.in_stock -= req.quantity
                         item.updated_at = datetime.utcnow()
+                        check_stock_level(item)
                         
+                        processed.append((req, item))
                         processed_count += 1
                 elif action == 'reject':
                     # 拒绝请求
@@ -221,9 +296,16 @@ def batch_process_requests():
                     req.approved_at = datetime.utcnow()
                     req.comment = comment
                     
+                    processed.append((req, None))
                     processed_count += 1
         
+        # 同一用户的多条变化合并为一条摘要通知
+        notify_request_changes([req for req, _ in processed])
         db.session.commit()
+        for req, item in processed:
+            publish_request_event(REQUEST_APPROVED if action == 'approve' else REQUEST_REJECTED, req)
+            if item:
+                publish_stock_event(item)
         
         action_text = '批准' if action == 'approve' else '拒绝'
         return jsonify({
@@ -243,23 +325,36 @@ def batch_process_requests():
 
 # 获取系统日志
 @admin_bp.route('/logs', methods=['GET'])
+@admin_required
+@read_only
 def get_logs():
     try:
-        # 这里可以实现更复杂的日志记录和查询功能
-        # 目前返回一个示例
-        logs = [
-            {
-                'timestamp': datetime.utcnow().isoformat(),
-                'level': 'INFO',
-                'message': '系统启动成功',
-                'user': 'system'
-            }
-        ]
+        target_id = request.args.get('target_id', type=int)
+        start_time = request.args.get('start_time')
+        end_time = request.args.get('end_time')
+        
+        try:
+            logs, next_cursor = query_logs(
+                username=request.args.get('username', '').strip() or None,
+                action=request.args.get('action', '').strip() or None,
+                target_type=request.args.get('target_type', '').strip() or None,
+                target_id=target_id,
+                start_time=datetime.fromisoformat(start_time) if start_time else None,
+                end_time=datetime.fromisoformat(end_time) if end_time else None,
+                cursor=request.args.get('cursor') or None,
+                limit=request.args.get('limit', 50, type=int)
+            )
+        except ValueError as e:
+            return jsonify({
+                'code': 400,
+                'message': f'查询参数错误: {str(e)}'
+            })
         
         return jsonify({
             'code': 200,
             'data': {
-                'logs': logs
+                'logs': [serialize_log(log) for log in logs],
+                'next_cursor': next_cursor
             },
             'message': '获取日志成功'
         })
@@ -270,32 +365,153 @@ def get_logs():
             'message': '获取日志失败'
         })
 
+# 日志归档：将超过保留期的日志移动到按月归档表
+@admin_bp.route('/logs/rollover', methods=['POST'])
+@admin_required
+def rollover_system_logs():
+    try:
+        data = request.json or {}
+        retention_days = int(data.get('retention_days', current_app.config['LOG_RETENTION_DAYS']))
+        moved = rollover_logs(retention_days)
+        
+        return jsonify({
+            'code': 200,
+            'data': {
+                'moved': moved,
+                'total_moved': sum(moved.values()),
+                'archive_tables': list_archive_tables()
+            },
+            'message': '日志归档成功'
+        })
+    except Exception as e:
+        print(f'日志归档失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '日志归档失败'
+        })
+
+# 申请归档：将超过保留期的已归还、已拒绝申请移动到归档表（async=1 时作为后台任务执行）
+@admin_bp.route('/requests/archive', methods=['POST'])
+@admin_required
+def archive_old_requests():
+    try:
+        data = request.json or {}
+        retention_days = int(data.get('retention_days', current_app.config['REQUEST_ARCHIVE_DAYS']))
+        
+        if wants_async():
+            return job_submitted(job_runner.submit(
+                'admin.archive_requests',
+                {'retention_days': retention_days},
+                username=session.get('username')
+            ))
+        
+        moved = archive_requests(retention_days, current_app.config['REQUEST_ARCHIVE_BATCH_SIZE'])
+        
+        return jsonify({
+            'code': 200,
+            'data': {
+                'moved': moved
+            },
+            'message': f'已归档 {moved} 条申请'
+        })
+    except Exception as e:
+        print(f'申请归档失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '申请归档失败'
+        })
+
+@job_runner.job('admin.archive_requests')
+def archive_requests_job(job, retention_days):
+    moved = archive_requests(retention_days, current_app.config['REQUEST_ARCHIVE_BATCH_SIZE'], job=job)
+    return {'moved': moved}
+
+# 库存预测：消耗速度、预计售罄时间和建议补货量
+# 默认返回每晚计算的缓存结果；refresh=1 时重新计算（可加 async=1 作为后台任务）
+@admin_bp.route('/forecast', methods=['GET'])
+@admin_required
+@read_only
+def get_forecast():
+    try:
+        refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+        if refresh and wants_async():
+            return job_submitted(job_runner.submit('admin.forecast', username=session.get('username')))
+        
+        data = forecast_cache.get()
+        if refresh or data is None:
+            data = refresh_forecast(current_app)
+        
+        items = data['items']
+        category = request.args.get('category', '').strip()
+        if category:
+            items = [item for item in items if item['category'] == category]
+        if request.args.get('reorder', '').lower() in ('1', 'true', 'yes'):
+            items = [item for item in items if item['reorder_quantity'] > 0]
+        limit = request.args.get('limit', type=int)
+        if limit:
+            items = items[:limit]
+        
+        return jsonify({
+            'code': 200,
+            'data': {
+                'computed_at': data['computed_at'],
+                'window_days': data['window_days'],
+                'lead_days': data['lead_days'],
+                'items': items
+            },
+            'message': '获取库存预测成功'
+        })
+    except Exception as e:
+        print(f'获取库存预测失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取库存预测失败'
+        })
+
+@job_runner.job('admin.forecast')
+def forecast_job(job):
+    # 预测只读数据库，与接口一样使用只读副本
+    g.use_read_replica = True
+    data = refresh_forecast(current_app)
+    return {'computed_at': data['computed_at'], 'item_count': len(data['items'])}
+
 # 系统设置
 @admin_bp.route('/settings', methods=['GET', 'PUT'])
+@admin_required
 def system_settings():
     try:
         if request.method == 'GET':
-            # 返回当前设置
-            settings = {
-                'system_name': '仓库管理系统',
-                'auto_approve': False,
-                'max_borrow_days': 7,
-                'notification_enabled': True
-            }
-            
+            # 返回当前设置（来自内存快照，不查询数据库）
             return jsonify({
                 'code': 200,
-                'data': settings,
+                'data': dict(settings.snapshot()),
                 'message': '获取系统设置成功'
             })
         
         elif request.method == 'PUT':
             # 更新系统设置
-            data = request.json
-            # 这里可以实现设置的保存逻辑
+            data = request.json or {}
+            if not data:
+                return jsonify({
+                    'code': 400,
+                    'message': '请提供要更新的设置'
+                })
+            
+            try:
+                # 限流规则逐条校验，避免保存后被限流器忽略
+                if 'rate_limits' in data:
+                    for value in parse_value('rate_limits', data['rate_limits']).values():
+                        parse_rate(value)
+                snapshot = settings.update(data)
+            except ValueError as e:
+                return jsonify({
+                    'code': 400,
+                    'message': f'设置值无效: {str(e)}'
+                })
             
             return jsonify({
                 'code': 200,
+                'data': dict(snapshot),
                 'message': '更新系统设置成功'
             })
     except Exception as e:
@@ -305,12 +521,20 @@ def system_settings():
             'message': '系统设置操作失败'
         })
 
-# 导出系统数据
+# 导出系统数据（async=1 时作为后台任务生成文件）
 @admin_bp.route('/export_data', methods=['GET'])
+@read_only
 def export_data():
     try:
         export_type = request.args.get('type', 'all')
         
+        if wants_async():
+            return job_submitted(job_runner.submit(
+                'admin.export_data',
+                {'export_type': export_type},
+                username=session.get('username')
+            ))
+        
         data = {
             'export_type': export_type,
             'export_time': datetime.utcnow().isoformat(),
@@ -318,53 +542,13 @@ def export_data():
         }
         
         if export_type in ['all', 'items']:
-            items = Item.query.all()
-            data['items'] = [
-                {
-                    'id': item.id,
-                    'name': item.name,
-                    'category': item.category,
-                    'total': item.total,
-                    'in_stock': item.in_stock,
-                    'description': item.description,
-                    'created_at': item.created_at.isoformat() if item.created_at else None,
-                    'updated_at': item.updated_at.isoformat() if item.updated_at else None
-                }
-                for item in items
-            ]
+            data['items'] = item_rows(Item.query)
         
         if export_type in ['all', 'requests']:
-            requests = Request.query.all()
-            data['requests'] = [
-                {
-                    'id': req.id,
-                    'username': req.username,
-                    'item_id': req.item_id,
-                    'item_name': req.item_name,
-                    'item_category': req.item_category,
-                    'quantity': req.quantity,
-                    'purpose': req.purpose,
-                    'status': req.status,
-                    'created_at': req.created_at.isoformat() if req.created_at else None,
-                    'approved_at': req.approved_at.isoformat() if req.approved_at else None,
-                    'approver': req.approver,
-                    'comment': req.comment,
-                    'returned_quantity': req.returned_quantity,
-                    'returned_at': req.returned_at.isoformat() if req.returned_at else None
-                }
-                for req in requests
-            ]
+            data['requests'] = query_request_history()
         
         if export_type in ['all', 'categories']:
-            categories = ItemCategory.query.all()
-            data['categories'] = [
-                {
-                    'id': cat.id,
-                    'name': cat.name,
-                    'description': cat.description
-                }
-                for cat in categories
-            ]
+            data['categories'] = category_rows(ItemCategory.query)
         
         return jsonify({
             'code': 200,
@@ -376,4 +560,194 @@ def export_data():
         return jsonify({
             'code': 500,
             'message': '导出数据失败'
-        })
\ No newline at end of file
+        })
+
+# 导出任务的数据段：名称 -> ([模型, ...], 字段)，申请包含已归档的申请
+EXPORT_SECTIONS = {
+    'items': ([Item], ITEM_FIELDS),
+    'requests': ([Request, RequestArchive], REQUEST_FIELDS),
+    'categories': ([ItemCategory], CATEGORY_FIELDS),
+}
+
+@job_runner.job('admin.export_data')
+def export_data_job(job, export_type='all'):
+    """导出为JSON文件，格式与同步导出的 data 字段相同，逐行写入以限制内存占用"""
+    g.use_read_replica = True
+    sections = [name for name in EXPORT_SECTIONS if export_type in ('all', name)]
+    export_time = datetime.utcnow()
+    dumps = current_app.json.dumps
+    counts = {}
+    
+    with job.open_result(f'export_{export_type}_{export_time.strftime("%Y%m%d%H%M%S")}.json') as f:
+        f.write('{"export_type":%s,"export_time":%s,"version":"1.0.0"' % (dumps(export_type), dumps(export_time)))
+        for index, name in enumerate(sections):
+            models, fields = EXPORT_SECTIONS[name]
+            f.write(f',"{name}":[')
+            counts[name] = 0
+            for model in models:
+                for row in iter_rows(model.query, model, fields):
+                    if counts[name]:
+                        f.write(',')
+                    f.write(dumps(row))
+                    counts[name] += 1
+            f.write(']')
+            job.progress(index + 1, len(sections), f'已导出 {name}')
+        f.write('}')
+    
+    return {'export_type': export_type, 'counts': counts}
+
+# 流式导出全量数据（gzip压缩的NDJSON）
+# 默认不包含用户密码，include_passwords=true 时才导出
+@admin_bp.route('/dump', methods=['GET'])
+@admin_required
+@read_only
+def dump_data():
+    try:
+        tables = [name for name in request.args.get('tables', '').split(',') if name]
+        include_secrets = request.args.get('include_passwords', 'false').lower() == 'true'
+        filename = f'warehouse_dump_{datetime.utcnow().strftime("%Y%m%d%H%M%S")}.ndjson.gz'
+        
+        return Response(
+            stream_with_context(iter_dump(tables or None, include_secrets=include_secrets)),
+            mimetype='application/gzip',
+            headers={'Content-Disposition': f'attachment; filename={filename}'}
+        )
+    except Exception as e:
+        print(f'导出数据失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '导出数据失败'
+        })
+
+# 从转储文件恢复数据
+@admin_bp.route('/restore', methods=['POST'])
+@admin_required
+def restore_data():
+    try:
+        if 'file' not in request.files:
+            return jsonify({
+                'code': 400,
+                'message': '请上传转储文件'
+            })
+        
+        replace = request.form.get('replace', 'true').lower() == 'true'
+        restored, skipped = restore_dump(request.files['file'].stream, replace=replace)
+        
+        message = '恢复数据成功'
+        if skipped:
+            message += f'，已跳过缺少必填列的表: {", ".join(skipped)}'
+        return jsonify({
+            'code': 200,
+            'data': {
+                'restored': restored,
+                'skipped': skipped,
+                'total_rows': sum(restored.values())
+            },
+            'message': message
+        })
+    except ValueError as e:
+        return jsonify({
+            'code': 400,
+            'message': str(e)
+        })
+    except Exception as e:
+        print(f'恢复数据失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '恢复数据失败'
+        })
+
+
+# 数据库在线快照：列出已有快照
+@admin_bp.route('/snapshots', methods=['GET'])
+@admin_required
+def get_snapshots():
+    try:
+        snapshots = list_snapshots(current_app.config['SNAPSHOT_DIR'])
+        
+        return jsonify({
+            'code': 200,
+            'data': {
+                'snapshots': snapshots
+            },
+            'message': '获取快照列表成功'
+        })
+    except Exception as e:
+        print(f'获取快照列表失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取快照列表失败'
+        })
+
+# 数据库在线快照：立即创建快照
+@admin_bp.route('/snapshots', methods=['POST'])
+@admin_required
+def trigger_snapshot():
+    try:
+        info = create_snapshot(
+            db.engine,
+            current_app.config['SNAPSHOT_DIR'],
+            current_app.config['SNAPSHOT_KEEP']
+        )
+        
+        return jsonify({
+            'code': 200,
+            'data': info,
+            'message': '创建快照成功'
+        })
+    except (ValueError, RuntimeError) as e:
+        return jsonify({
+            'code': 400,
+            'message': str(e)
+        })
+    except Exception as e:
+        print(f'创建快照失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '创建快照失败'
+        })
+
+
+# 性能分析：最近的分析结果列表
+@admin_bp.route('/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    try:
+        return jsonify({
+            'code': 200,
+            'data': {
+                'enabled': current_app.config['PROFILING_ENABLED'],
+                'profiles': get_profiles()
+            },
+            'message': '获取性能分析列表成功'
+        })
+    except Exception as e:
+        print(f'获取性能分析列表失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取性能分析列表失败'
+        })
+
+# 性能分析：单次请求的函数耗时和SQL耗时
+@admin_bp.route('/profiles/<int:profile_id>', methods=['GET'])
+@admin_required
+def get_profile_detail(profile_id):
+    try:
+        profile = get_profile(profile_id)
+        if not profile:
+            return jsonify({
+                'code': 404,
+                'message': '性能分析结果不存在'
+            })
+        
+        return jsonify({
+            'code': 200,
+            'data': profile,
+            'message': '获取性能分析结果成功'
+        })
+    except Exception as e:
+        print(f'获取性能分析结果失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取性能分析结果失败'
+        })
@@ -0,0 +1,41 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from extensions import db
+from auth import login_required, get_session_principal
+from utils.events import event_hub
+
+event_bp = Blueprint('events', __name__)
+
+# 事件推送（Server-Sent Events），替代前端轮询
+@event_bp.route('/stream', methods=['GET'])
+@login_required
+def event_stream():
+    # 订阅身份只取自会话，不接受请求参数中的用户名
+    principal = get_session_principal()
+    
+    # 浏览器重连时通过 Last-Event-ID 请求头携带最后收到的事件ID
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    subscription, missed = event_hub.subscribe(principal.username, principal.role == 'admin', last_event_id)
+    if subscription is None:
+        # 连接数已满，避免占满工作线程；浏览器稍后重试
+        return jsonify({
+            'code': 503,
+            'message': '事件连接数已达上限，请稍后重试'
+        }), 503, {'Retry-After': '30'}
+    
+    # 推送期间不再访问数据库：先归还连接、结束事务，避免长连接占用连接池
+    # 或使 SQLite 一直保持读快照
+    db.session.remove()
+    
+    return Response(
+        stream_with_context(event_hub.stream(subscription, missed)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
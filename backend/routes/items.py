@@ -1,12 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, session
 from datetime import datetime
-from ..app import db
-from ..models import Item, ItemCategory
+from extensions import db
+from models import Item, ItemCategory
+from utils.routing import read_only
+from utils.serializers import item_rows, serialize_item
+from utils.jobs import job_runner, wants_async, job_submitted
+from utils.events import event_hub, publish_stock_event, ITEM_STOCK_CHANGED
+from utils.stock_alerts import check_stock_level, refresh_category, parse_min_stock
 
 item_bp = Blueprint('items', __name__)
 
 # 获取物品列表
 @item_bp.route('/', methods=['GET'])
+@read_only
 def get_items():
     try:
         # 获取查询参数
@@ -32,23 +38,11 @@ def get_items():
             query = query.filter(Item.in_stock == 0)
         elif status == 'partial_in_stock':
             query = query.filter(Item.in_stock < Item.total, Item.in_stock > 0)
+        elif status == 'low_stock':
+            query = query.filter(Item.low_stock.is_(True))
         
-        # 执行查询
-        items = query.all()
-        
-        # 构建响应数据
-        result = []
-        for item in items:
-            result.append({
-                'id': item.id,
-                'name': item.name,
-                'category': item.category,
-                'total': item.total,
-                'in_stock': item.in_stock,
-                'description': item.description,
-                'created_at': item.created_at.isoformat() if item.created_at else None,
-                'updated_at': item.updated_at.isoformat() if item.updated_at else None
-            })
+        # 执行查询，只取需要的列
+        result = item_rows(query)
         
         return jsonify({
             'code': 200,
@@ -62,8 +56,40 @@ def get_items():
             'message': '获取物品列表失败'
         })
 
+# 获取低库存物品列表，按当前库存升序
+@item_bp.route('/low_stock', methods=['GET'])
+@read_only
+def get_low_stock_items():
+    try:
+        # low_stock 标记在库存变化时维护，这里只读取索引范围
+        min_stock = db.func.coalesce(Item.min_stock, ItemCategory.default_min_stock, 0).label('min_stock')
+        query = (
+            db.session.query(Item.id, Item.name, Item.category, Item.total, Item.in_stock, min_stock)
+            .outerjoin(ItemCategory, ItemCategory.name == Item.category)
+            .filter(Item.low_stock.is_(True))
+        )
+        
+        category = request.args.get('category', '').strip()
+        if category:
+            query = query.filter(Item.category == category)
+        
+        result = query.order_by(Item.in_stock, Item.id).all()
+        
+        return jsonify({
+            'code': 200,
+            'data': result,
+            'message': '获取低库存物品成功'
+        })
+    except Exception as e:
+        print(f'获取低库存物品失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取低库存物品失败'
+        })
+
 # 获取单个物品
 @item_bp.route('/<int:item_id>', methods=['GET'])
+@read_only
 def get_item(item_id):
     try:
         item = Item.query.get(item_id)
@@ -75,16 +101,7 @@ def get_item(item_id):
         
         return jsonify({
             'code': 200,
-            'data': {
-                'id': item.id,
-                'name': item.name,
-                'category': item.category,
-                'total': item.total,
-                'in_stock': item.in_stock,
-                'description': item.description,
-                'created_at': item.created_at.isoformat() if item.created_at else None,
-                'updated_at': item.updated_at.isoformat() if item.updated_at else None
-            },
+            'data': serialize_item(item),
             'message': '获取物品信息成功'
         })
     except Exception as e:
@@ -123,6 +140,15 @@ def add_item():
                 'message': '当前库存不能大于总库存'
             })
         
+        # 最低库存为空时使用分类默认值
+        try:
+            min_stock = parse_min_stock(data.get('min_stock'))
+        except ValueError as e:
+            return jsonify({
+                'code': 400,
+                'message': str(e)
+            })
+        
         # 检查分类是否存在
         category = data.get('category', '未分类')
         existing_category = ItemCategory.query.filter_by(name=category).first()
@@ -137,11 +163,14 @@ def add_item():
             category=category,
             total=total,
             in_stock=in_stock,
+            min_stock=min_stock,
             description=data.get('description', '')
         )
         
         db.session.add(item)
+        check_stock_level(item)
         db.session.commit()
+        publish_stock_event(item)
         
         return jsonify({
             'code': 200,
@@ -151,6 +180,8 @@ def add_item():
                 'category': item.category,
                 'total': item.total,
                 'in_stock': item.in_stock,
+                'min_stock': item.min_stock,
+                'low_stock': item.low_stock,
                 'description': item.description
             },
             'message': '添加物品成功'
@@ -213,11 +244,23 @@ def update_item(item_id):
                 })
             item.in_stock = in_stock
         
+        if 'min_stock' in data:
+            # 为空时恢复使用分类默认值
+            try:
+                item.min_stock = parse_min_stock(data['min_stock'])
+            except ValueError as e:
+                return jsonify({
+                    'code': 400,
+                    'message': str(e)
+                })
+        
         if 'description' in data:
             item.description = data['description']
         
         item.updated_at = datetime.utcnow()
+        check_stock_level(item)
         db.session.commit()
+        publish_stock_event(item)
         
         return jsonify({
             'code': 200,
@@ -227,6 +270,8 @@ def update_item(item_id):
                 'category': item.category,
                 'total': item.total,
                 'in_stock': item.in_stock,
+                'min_stock': item.min_stock,
+                'low_stock': item.low_stock,
                 'description': item.description
             },
             'message': '更新物品成功'
@@ -251,7 +296,7 @@ def delete_item(item_id):
             })
         
         # 检查是否有相关的申请记录
-        from ..models import Request
+        from models import Request
         active_requests = Request.query.filter_by(
             item_id=item_id,
             status='approved'
@@ -265,6 +310,7 @@ def delete_item(item_id):
         
         db.session.delete(item)
         db.session.commit()
+        event_hub.publish(ITEM_STOCK_CHANGED, {'id': item_id, 'deleted': True})
         
         return jsonify({
             'code': 200,
@@ -278,7 +324,86 @@ def delete_item(item_id):
             'message': '删除物品失败'
         })
 
-# 批量添加物品
+# 后台任务中每处理多少个物品提交一次并更新进度
+BATCH_JOB_CHUNK_SIZE = 500
+
+def add_items(items_data, job=None):
+    """批量添加物品，返回 (成功数量, 错误列表)
+
+    在后台任务中执行时按块提交并报告进度；同步执行时在一个事务中完成。
+    """
+    added_count = 0
+    added_items = []
+    errors = []
+    
+    for idx, item_data in enumerate(items_data):
+        try:
+            # 验证必填字段
+            if not item_data.get('name'):
+                errors.append(f'第{idx+1}项：物品名称不能为空')
+                continue
+            
+            # 验证库存数量
+            total = item_data.get('total', 0)
+            in_stock = item_data.get('in_stock', 0)
+            
+            if total < 0 or in_stock < 0:
+                errors.append(f'第{idx+1}项：库存数量不能为负数')
+                continue
+            
+            if in_stock > total:
+                errors.append(f'第{idx+1}项：当前库存不能大于总库存')
+                continue
+            
+            try:
+                min_stock = parse_min_stock(item_data.get('min_stock'))
+            except ValueError as e:
+                errors.append(f'第{idx+1}项：{e}')
+                continue
+            
+            # 检查分类是否存在
+            category = item_data.get('category', '未分类')
+            existing_category = ItemCategory.query.filter_by(name=category).first()
+            if not existing_category:
+                # 创建新分类
+                existing_category = ItemCategory(name=category, description='自动创建的分类', default_min_stock=0)
+                db.session.add(existing_category)
+            
+            # 创建物品
+            item = Item(
+                name=item_data['name'],
+                category=category,
+                total=total,
+                in_stock=in_stock,
+                min_stock=min_stock,
+                description=item_data.get('description', '')
+            )
+            
+            db.session.add(item)
+            # 分类已查询过，直接传入最低库存，不再逐个查询
+            check_stock_level(item, min_stock if min_stock is not None else existing_category.default_min_stock)
+            added_items.append(item)
+            added_count += 1
+            
+        except Exception as e:
+            errors.append(f'第{idx+1}项：添加失败 - {str(e)}')
+        finally:
+            if job and (idx + 1) % BATCH_JOB_CHUNK_SIZE == 0 and added_items:
+                db.session.commit()
+                for added in added_items:
+                    publish_stock_event(added)
+                added_items = []
+                job.progress(idx + 1, len(items_data), f'已处理 {idx + 1} 个物品')
+    
+    # 如果有成功添加的物品，提交事务
+    if added_items:
+        db.session.commit()
+        for item in added_items:
+            publish_stock_event(item)
+    
+    return added_count, errors
+
+# 批量添加物品（async=1 时作为后台任务执行）
 @item_bp.route('/batch', methods=['POST'])
 def batch_add_items():
     try:
@@ -291,54 +416,14 @@ def batch_add_items():
                 'message': '请提供物品数据'
             })
         
-        added_count = 0
-        errors = []
+        if wants_async():
+            return job_submitted(job_runner.submit(
+                'items.batch_add_items',
+                {'items_data': items_data},
+                username=session.get('username')
+            ))
         
-        for idx, item_data in enumerate(items_data):
-            try:
-                # 验证必填字段
-                if not item_data.get('name'):
-                    errors.append(f'第{idx+1}项：物品名称不能为空')
-                    continue
-                
-                # 验证库存数量
-                total = item_data.get('total', 0)
-                in_stock = item_data.get('in_stock', 0)
-                
-                if total < 0 or in_stock < 0:
-                    errors.append(f'第{idx+1}项：库存数量不能为负数')
-                    continue
-                
-                if in_stock > total:
-                    errors.append(f'第{idx+1}项：当前库存不能大于总库存')
-                    continue
-                
-                # 检查分类是否存在
-                category = item_data.get('category', '未分类')
-                existing_category = ItemCategory.query.filter_by(name=category).first()
-                if not existing_category:
-                    # 创建新分类
-                    new_category = ItemCategory(name=category, description='自动创建的分类')
-                    db.session.add(new_category)
-                
-                # 创建物品
-                item = Item(
-                    name=item_data['name'],
-                    category=category,
-                    total=total,
-                    in_stock=in_stock,
-                    description=item_data.get('description', '')
-                )
-                
-                db.session.add(item)
-                added_count += 1
-                
-            except Exception as e:
-                errors.append(f'第{idx+1}项：添加失败 - {str(e)}')
-        
-        # 如果有成功添加的物品，提交事务
-        if added_count > 0:
-            db.session.commit()
+        added_count, errors = add_items(items_data)
         
         result = {
             'code': 200 if added_count > 0 else 400,
@@ -366,8 +451,18 @@ def batch_add_items():
             'message': '批量添加物品失败'
         })
 
+@job_runner.job('items.batch_add_items')
+def batch_add_items_job(job, items_data):
+    added_count, errors = add_items(items_data, job)
+    return {
+        'added_count': added_count,
+        'total_items': len(items_data),
+        'errors': errors
+    }
+
 # 获取分类列表
 @item_bp.route('/categories', methods=['GET'])
+@read_only
 def get_categories():
     try:
         categories = ItemCategory.query.all()
@@ -380,6 +475,7 @@ def get_categories():
                 'id': category.id,
                 'name': category.name,
                 'description': category.description,
+                'default_min_stock': category.default_min_stock,
                 'item_count': item_count
             })
         
@@ -416,10 +512,19 @@ def add_category():
                 'message': '分类已存在'
             })
         
+        try:
+            default_min_stock = parse_min_stock(data.get('default_min_stock')) or 0
+        except ValueError as e:
+            return jsonify({
+                'code': 400,
+                'message': str(e)
+            })
+        
         # 创建分类
         category = ItemCategory(
             name=data['name'],
-            description=data.get('description', '')
+            description=data.get('description', ''),
+            default_min_stock=default_min_stock
         )
         
         db.session.add(category)
@@ -430,7 +535,8 @@ def add_category():
             'data': {
                 'id': category.id,
                 'name': category.name,
-                'description': category.description
+                'description': category.description,
+                'default_min_stock': category.default_min_stock
             },
             'message': '添加分类成功'
         })
@@ -471,6 +577,19 @@ def update_category(category_id):
         if 'description' in data:
             category.description = data['description']
         
+        if 'default_min_stock' in data:
+            try:
+                default_min_stock = parse_min_stock(data['default_min_stock']) or 0
+            except ValueError as e:
+                return jsonify({
+                    'code': 400,
+                    'message': str(e)
+                })
+            if default_min_stock != category.default_min_stock:
+                category.default_min_stock = default_min_stock
+                # 只重新计算使用分类默认值的物品
+                refresh_category(category)
+        
         db.session.commit()
         
         return jsonify({
@@ -478,7 +597,8 @@ def update_category(category_id):
             'data': {
                 'id': category.id,
                 'name': category.name,
-                'description': category.description
+                'description': category.description,
+                'default_min_stock': category.default_min_stock
             },
             'message': '更新分类成功'
         })
@@ -534,6 +654,7 @@ def delete_category(category_id):
 
 # 获取物品统计信息
 @item_bp.route('/statistics', methods=['GET'])
+@read_only
 def get_item_statistics():
     try:
         # 计算各种统计数据
@@ -541,6 +662,7 @@ def get_item_statistics():
         total_quantity = db.session.query(db.func.sum(Item.total)).scalar() or 0
         available_quantity = db.session.query(db.func.sum(Item.in_stock)).scalar() or 0
         borrowed_quantity = total_quantity - available_quantity
+        low_stock_items = Item.query.filter(Item.low_stock.is_(True)).count()
         
         # 按分类统计
         category_stats = []
@@ -565,6 +687,7 @@ def get_item_statistics():
                 'total_quantity': total_quantity,
                 'available_quantity': available_quantity,
                 'borrowed_quantity': borrowed_quantity,
+                'low_stock_items': low_stock_items,
                 'category_stats': category_stats
             },
             'message': '获取物品统计信息成功'
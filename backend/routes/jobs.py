@@ -0,0 +1,95 @@
+import os
+from flask import Blueprint, request, jsonify, send_from_directory
+from auth import login_required, get_session_principal
+from models import Job
+from utils.jobs import job_runner, serialize_job
+
+job_bp = Blueprint('jobs', __name__)
+
+def _get_visible_job(job_id):
+    """获取当前用户可以查看的任务，管理员可查看全部任务"""
+    job = Job.query.get(job_id)
+    if not job:
+        return None
+    principal = get_session_principal()
+    if principal.role != 'admin' and job.username != principal.username:
+        return None
+    return job_runner.check_stale(job)
+
+# 获取当前用户的任务列表
+@job_bp.route('/', methods=['GET'])
+@login_required
+def get_jobs():
+    try:
+        principal = get_session_principal()
+        limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+
+        query = Job.query
+        if principal.role != 'admin' or request.args.get('mine', 'true').lower() == 'true':
+            query = query.filter(Job.username == principal.username)
+        jobs = query.order_by(Job.id.desc()).limit(limit).all()
+
+        return jsonify({
+            'code': 200,
+            'data': [serialize_job(job_runner.check_stale(job)) for job in jobs],
+            'message': '获取任务列表成功'
+        })
+    except Exception as e:
+        print(f'获取任务列表失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取任务列表失败'
+        })
+
+# 查询任务状态和进度
+@job_bp.route('/<int:job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    try:
+        job = _get_visible_job(job_id)
+        if not job:
+            return jsonify({
+                'code': 404,
+                'message': '任务不存在'
+            })
+
+        return jsonify({
+            'code': 200,
+            'data': serialize_job(job),
+            'message': '获取任务状态成功'
+        })
+    except Exception as e:
+        print(f'获取任务状态失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取任务状态失败'
+        })
+
+# 下载任务结果文件
+@job_bp.route('/<int:job_id>/download', methods=['GET'])
+@login_required
+def download_job_result(job_id):
+    try:
+        job = _get_visible_job(job_id)
+        if not job:
+            return jsonify({
+                'code': 404,
+                'message': '任务不存在'
+            })
+
+        path = job_runner.result_path(job)
+        if job.status != 'succeeded' or not path or not os.path.exists(path):
+            return jsonify({
+                'code': 404,
+                'message': '任务没有可下载的结果'
+            })
+
+        # 文件名去掉任务ID前缀
+        download_name = job.result_file.split('_', 1)[1]
+        return send_from_directory(job_runner.result_dir, job.result_file, as_attachment=True, download_name=download_name)
+    except Exception as e:
+        print(f'下载任务结果失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '下载任务结果失败'
+        })
@@ -0,0 +1,84 @@
+from flask import Blueprint, request, jsonify
+from auth import login_required, get_session_principal
+from utils.notifications import list_notifications, get_unread_count, mark_read, serialize_notification
+
+notification_bp = Blueprint('notifications', __name__)
+
+def _current_username():
+    """当前登录用户名，只信任会话，不接受请求参数中的用户名"""
+    return get_session_principal().username
+
+# 获取通知列表
+@notification_bp.route('/', methods=['GET'])
+@login_required
+def get_notifications():
+    try:
+        username = _current_username()
+        
+        notifications, next_before_id = list_notifications(
+            username,
+            before_id=request.args.get('before_id', type=int),
+            unread_only=request.args.get('unread_only', 'false').lower() == 'true',
+            limit=request.args.get('limit', 20, type=int)
+        )
+        
+        return jsonify({
+            'code': 200,
+            'data': {
+                'notifications': [serialize_notification(n) for n in notifications],
+                'next_before_id': next_before_id
+            },
+            'message': '获取通知列表成功'
+        })
+    except Exception as e:
+        print(f'获取通知列表失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取通知列表失败'
+        })
+
+# 获取未读通知数
+@notification_bp.route('/unread_count', methods=['GET'])
+@login_required
+def get_notification_unread_count():
+    try:
+        username = _current_username()
+        
+        return jsonify({
+            'code': 200,
+            'data': {
+                'unread': get_unread_count(username)
+            },
+            'message': '获取未读通知数成功'
+        })
+    except Exception as e:
+        print(f'获取未读通知数失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '获取未读通知数失败'
+        })
+
+# 批量标记已读，不提供ids时全部标记为已读
+@notification_bp.route('/read', methods=['POST'])
+@login_required
+def mark_notifications_read():
+    try:
+        username = _current_username()
+        
+        data = request.json or {}
+        updated = mark_read(username, data.get('ids') or None)
+        
+        return jsonify({
+            'code': 200,
+            'data': {
+                'updated_count': updated,
+                'unread': get_unread_count(username)
+            },
+            'message': f'已将 {updated} 条通知标记为已读'
+        })
+    except Exception as e:
+        print(f'标记通知已读失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '标记通知已读失败'
+        })
@@ -1,5 +1,12 @@
 from flask import Blueprint, request, jsonify
-from models.db import db, Request, Item
+from extensions import db
+from models import Request, Item
+from utils.routing import read_only
+from utils.serializers import request_rows
+from utils.archive import query_request_history
+from utils.notifications import notify_request_changes
+from utils.stock_alerts import check_stock_level
+from utils.events import publish_request_event, publish_stock_event, REQUEST_CREATED, REQUEST_APPROVED, REQUEST_REJECTED, REQUEST_RETURNED
 import logging
 from datetime import datetime
 
@@ -7,12 +14,21 @@ requests_bp = Blueprint('requests', __name__)
 logger = logging.getLogger(__name__)
 
 @requests_bp.route('/', methods=['GET'])
+@read_only
 def get_requests():
     try:
         # 获取查询参数
         username = request.args.get('username')
         status = request.args.get('status')
         
+        # 需要历史记录时合并查询已归档的申请
+        if request.args.get('include_history', 'false').lower() == 'true':
+            return jsonify({
+                'code': 200,
+                'message': '获取申请列表成功',
+                'data': query_request_history(username, status)
+            })
+        
         # 构建查询
         query = Request.query
         
@@ -22,25 +38,7 @@ def get_requests():
             query = query.filter(Request.status == status)
         
         # 按时间倒序排列
-        requests = query.order_by(Request.created_at.desc()).all()
-        
-        # 转换为JSON格式
-        result = []
-        for req in requests:
-            result.append({
-                'id': req.id,
-                'username': req.username,
-                'item_id': req.item_id,
-                'item_name': req.item.name if req.item else '',
-                'item_category': req.item.category if req.item else '',
-                'quantity': req.quantity,
-                'purpose': req.purpose,
-                'status': req.status,
-                'created_at': req.created_at,
-                'approved_at': req.approved_at,
-                'approver': req.approver,
-                'comment': req.comment
-            })
+        result = request_rows(query.order_by(Request.created_at.desc()))
         
         return jsonify({
             'code': 200,
@@ -66,14 +64,17 @@ def create_request():
         # 创建新申请
         new_request = Request(
             username=data.get('username'),
-            item_id=data.get('item_id'),
+            item_id=item.id,
+            item_name=item.name,
+            item_category=item.category,
             quantity=data.get('quantity'),
-            purpose=data.get('purpose'),
+            purpose=data.get('purpose') or '',
             status='pending'
         )
         
         db.session.add(new_request)
         db.session.commit()
+        publish_request_event(REQUEST_CREATED, new_request)
         
         logger.info(f'创建申请成功: 用户 {new_request.username} 申请 {item.name}')
         return jsonify({
@@ -107,21 +108,19 @@ def approve_request(request_id):
         
         # 更新申请状态
         req.status = 'approved'
-        req.approved_at = datetime.now()
+        req.approved_at = datetime.utcnow()
         req.approver = data.get('approver')
         req.comment = data.get('comment')
         
-        # 更新物品库存
+        # 更新物品库存（库存状态由 in_stock 和 total 计算，不单独保存）
         item.in_stock -= req.quantity
-        item.on_loan += req.quantity
-        item.user = req.username
-        
-        if item.in_stock == 0:
-            item.status = 'out_of_stock'
-        else:
-            item.status = 'partial_in_stock'
+        item.updated_at = datetime.utcnow()
+        check_stock_level(item)
         
+        notify_request_changes([req])
         db.session.commit()
+        publish_request_event(REQUEST_APPROVED, req)
+        publish_stock_event(item)
         
         logger.info(f'审批通过申请: ID {req.id}')
         return jsonify({
@@ -145,11 +144,13 @@ def reject_request(request_id):
         
         # 更新申请状态
         req.status = 'rejected'
-        req.approved_at = datetime.now()
+        req.approved_at = datetime.utcnow()
         req.approver = data.get('approver')
         req.comment = data.get('comment')
         
+        notify_request_changes([req])
         db.session.commit()
+        publish_request_event(REQUEST_REJECTED, req)
         
         logger.info(f'拒绝申请: ID {req.id}')
         return jsonify({
@@ -181,23 +182,22 @@ def return_item(request_id):
         
         # 更新物品库存
         item.in_stock += return_quantity
-        item.on_loan -= return_quantity
-        
-        # 更新物品状态
-        if item.on_loan == 0:
-            item.status = 'in_stock'
-            item.user = None
-        else:
-            item.status = 'partial_in_stock'
+        item.updated_at = datetime.utcnow()
+        check_stock_level(item)
         
-        # 更新申请状态
+        # 更新申请状态；记录归还时间，归档和历史查询按最后处理时间判断
         if return_quantity == req.quantity:
             req.status = 'returned'
         else:
             req.status = 'partially_returned'
             req.quantity -= return_quantity
+        req.returned_quantity = (req.returned_quantity or 0) + return_quantity
+        req.returned_at = datetime.utcnow()
         
+        notify_request_changes([req])
         db.session.commit()
+        publish_request_event(REQUEST_RETURNED, req)
+        publish_stock_event(item)
         
         logger.info(f'归还物品: ID {req.id}')
         return jsonify({
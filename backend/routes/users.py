@@ -1,8 +1,13 @@
 from flask import Blueprint, request, jsonify, session
-from ..auth import login, logout, change_password, get_user_info, update_user_profile, get_all_users, create_user, update_user, delete_user, login_required, admin_required
-from ..app import db
-from ..models import User, Log
+from auth import login, logout, change_password, get_user_info, update_user_profile, search_users, create_user, bulk_create_users, update_user, delete_user, login_required, admin_required, get_session_principal
+from extensions import db
+from models import User
+from utils.routing import read_only
+from utils.audit import audit_log
+from utils.passwords import HashingOverloaded
 from datetime import datetime
+import csv
+import io
 
 user_bp = Blueprint('users', __name__)
 
@@ -23,15 +28,13 @@ def user_login():
         success, message = login(username, password)
         if not success:
             # 记录登录失败日志
-            log = Log(
+            audit_log(
                 username=username,
                 action='登录失败',
                 details=message,
                 ip_address=request.remote_addr,
                 user_agent=request.user_agent.string
             )
-            db.session.add(log)
-            db.session.commit()
             
             return jsonify({
                 'code': 401,
@@ -39,15 +42,13 @@ def user_login():
             })
         
         # 记录登录成功日志
-        log = Log(
+        audit_log(
             username=username,
             action='登录成功',
             details='用户登录成功',
             ip_address=request.remote_addr,
             user_agent=request.user_agent.string
         )
-        db.session.add(log)
-        db.session.commit()
         
         # 获取用户角色，用于前端跳转
         user = User.query.filter_by(username=username).first()
@@ -61,6 +62,11 @@ def user_login():
             },
             'message': message
         })
+    except HashingOverloaded as e:
+        return jsonify({
+            'code': 503,
+            'message': str(e)
+        }), 503
     except Exception as e:
         print(f'登录失败: {str(e)}')
         return jsonify({
@@ -76,15 +82,13 @@ def user_logout():
         success, message = logout()
         
         # 记录登出日志
-        log = Log(
+        audit_log(
             username=username,
             action='登出',
             details='用户登出成功',
             ip_address=request.remote_addr,
             user_agent=request.user_agent.string
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'code': 200,
@@ -139,14 +143,12 @@ def update_profile():
             })
         
         # 记录更新日志
-        log = Log(
+        audit_log(
             username=session.get('username'),
             action='更新个人信息',
             details=f'用户ID: {user_id}',
             ip_address=request.remote_addr
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'code': 200,
@@ -197,19 +199,22 @@ def user_change_password():
             })
         
         # 记录密码修改日志
-        log = Log(
+        audit_log(
             username=session.get('username'),
             action='修改密码',
             details=f'用户ID: {user_id}',
             ip_address=request.remote_addr
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'code': 200,
             'message': message
         })
+    except HashingOverloaded as e:
+        return jsonify({
+            'code': 503,
+            'message': str(e)
+        }), 503
     except Exception as e:
         print(f'修改密码失败: {str(e)}')
         return jsonify({
@@ -219,14 +224,29 @@ def user_change_password():
 
 # 管理员功能：获取所有用户列表
 @user_bp.route('/all', methods=['GET'])
+@read_only
 @admin_required
 def get_users_list():
     try:
-        users = get_all_users()
+        is_active = request.args.get('is_active')
+        fields = request.args.get('fields')
+        
+        users, next_cursor = search_users(
+            prefix=request.args.get('q', '').strip() or None,
+            department=request.args.get('department', '').strip() or None,
+            role=request.args.get('role', '').strip() or None,
+            is_active=is_active.lower() == 'true' if is_active else None,
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', 50, type=int),
+            fields=fields.split(',') if fields else None
+        )
         
         return jsonify({
             'code': 200,
-            'data': users,
+            'data': {
+                'users': users,
+                'next_cursor': next_cursor
+            },
             'message': '获取用户列表成功'
         })
     except Exception as e:
@@ -271,19 +291,22 @@ def create_new_user():
             })
         
         # 记录创建用户日志
-        log = Log(
+        audit_log(
             username=session.get('username'),
             action='创建用户',
             details=f'用户名: {username}, 角色: {role}',
             ip_address=request.remote_addr
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'code': 200,
             'message': message
         })
+    except HashingOverloaded as e:
+        return jsonify({
+            'code': 503,
+            'message': str(e)
+        }), 503
     except Exception as e:
         print(f'创建用户失败: {str(e)}')
         return jsonify({
@@ -291,6 +314,56 @@ def create_new_user():
             'message': '创建用户失败'
         })
 
+# 管理员功能：批量创建用户（JSON 或 CSV 文件）
+@user_bp.route('/bulk_create', methods=['POST'])
+@admin_required
+def bulk_create_new_users():
+    try:
+        if 'file' in request.files:
+            # CSV 表头：username,password,role,department,phone,email
+            content = request.files['file'].stream.read().decode('utf-8-sig')
+            rows = list(csv.DictReader(io.StringIO(content)))
+        else:
+            rows = (request.json or {}).get('users', [])
+        
+        if not rows:
+            return jsonify({
+                'code': 400,
+                'message': '请提供用户数据'
+            })
+        
+        created, errors = bulk_create_users(rows)
+        
+        # 整批只记录一条日志
+        if created:
+            audit_log(
+                username=session.get('username'),
+                action='批量创建用户',
+                details=f'创建 {len(created)} 个用户，失败 {len(errors)} 个',
+                ip_address=request.remote_addr
+            )
+        
+        return jsonify({
+            'code': 200 if created else 400,
+            'data': {
+                'created_count': len(created),
+                'total': len(rows),
+                'errors': errors
+            },
+            'message': f'成功创建 {len(created)} 个用户，失败 {len(errors)} 个'
+        })
+    except HashingOverloaded as e:
+        return jsonify({
+            'code': 503,
+            'message': str(e)
+        }), 503
+    except Exception as e:
+        print(f'批量创建用户失败: {str(e)}')
+        return jsonify({
+            'code': 500,
+            'message': '批量创建用户失败'
+        })
+
 # 管理员功能：更新用户信息
 @user_bp.route('/<int:user_id>', methods=['PUT'])
 @admin_required
@@ -306,19 +379,22 @@ def update_user_info(user_id):
             })
         
         # 记录更新用户日志
-        log = Log(
+        audit_log(
             username=session.get('username'),
             action='更新用户信息',
             details=f'用户ID: {user_id}',
             ip_address=request.remote_addr
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'code': 200,
             'message': message
         })
+    except HashingOverloaded as e:
+        return jsonify({
+            'code': 503,
+            'message': str(e)
+        }), 503
     except Exception as e:
         print(f'更新用户信息失败: {str(e)}')
         return jsonify({
@@ -340,14 +416,12 @@ def delete_user_account(user_id):
             })
         
         # 记录删除用户日志
-        log = Log(
+        audit_log(
             username=session.get('username'),
             action='删除用户',
             details=f'用户ID: {user_id}',
             ip_address=request.remote_addr
         )
-        db.session.add(log)
-        db.session.commit()
         
         return jsonify({
             'code': 200,
@@ -362,6 +436,7 @@ def delete_user_account(user_id):
 
 # 获取用户统计信息
 @user_bp.route('/statistics', methods=['GET'])
+@read_only
 @admin_required
 def get_user_statistics():
     try:
@@ -427,14 +502,14 @@ def get_user_statistics():
 @user_bp.route('/check-login', methods=['GET'])
 def check_login_status():
     try:
-        if 'username' in session:
-            user = User.query.filter_by(username=session['username']).first()
+        principal = get_session_principal()
+        if principal and principal.is_active:
             return jsonify({
                 'code': 200,
                 'data': {
                     'is_logged_in': True,
-                    'username': session['username'],
-                    'role': user.role if user else 'user'
+                    'username': principal.username,
+                    'role': principal.role
                 },
                 'message': '已登录'
             })
@@ -0,0 +1,153 @@
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from app import create_app
+from extensions import db
+from models import ItemCategory, Item, Request, User
+
+# 申请状态及其占比
+REQUEST_STATUSES = [
+    ('returned', 0.55),
+    ('approved', 0.2),
+    ('rejected', 0.1),
+    ('pending', 0.1),
+    ('partially_returned', 0.05),
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='生成用于压测的合成数据')
+    parser.add_argument('--categories', type=int, default=2000, help='分类数量')
+    parser.add_argument('--items', type=int, default=500000, help='物品数量')
+    parser.add_argument('--users', type=int, default=50000, help='用户数量')
+    parser.add_argument('--requests', type=int, default=5000000, help='申请数量')
+    parser.add_argument('--days', type=int, default=365, help='申请时间分布的天数')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='每批插入的行数')
+    parser.add_argument('--seed', type=int, default=42, help='随机数种子，相同种子生成相同数据')
+    parser.add_argument('--password', default='bench123', help='所有合成用户的密码')
+    parser.add_argument('--append', action='store_true', help='保留现有数据（默认清空后重建）')
+    return parser.parse_args()
+
+def bulk_insert(table, rows_iter, total, chunk_size):
+    """按块批量插入并输出进度"""
+    started = time.perf_counter()
+    chunk = []
+    inserted = 0
+    for row in rows_iter:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            db.session.execute(table.insert(), chunk)
+            db.session.commit()
+            inserted += len(chunk)
+            chunk = []
+            elapsed = time.perf_counter() - started
+            print(f'\r  {table.name}: {inserted}/{total} ({inserted / elapsed:.0f} 行/秒)', end='', flush=True)
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        db.session.commit()
+        inserted += len(chunk)
+    print(f'\r  {table.name}: {inserted}/{total}，耗时 {time.perf_counter() - started:.1f} 秒')
+
+def generate_data(args):
+    """生成合成数据集"""
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    statuses = [status for status, _ in REQUEST_STATUSES]
+    weights = [weight for _, weight in REQUEST_STATUSES]
+
+    category_names = ['未分类'] + [f'分类{i:05d}' for i in range(1, args.categories)]
+    print(f'创建 {len(category_names)} 个分类...')
+    bulk_insert(ItemCategory.__table__, (
+        {'name': name, 'description': f'{name}的描述', 'created_at': now}
+        for name in category_names
+    ), len(category_names), args.chunk_size)
+
+    print(f'创建 {args.items} 个物品...')
+    # 记录物品信息供生成申请时使用，避免回查数据库
+    item_info = []
+
+    def items():
+        for i in range(1, args.items + 1):
+            total = rng.randint(1, 500)
+            category = rng.choice(category_names)
+            item_info.append((f'物品{i:07d}', category))
+            yield {
+                'id': i,
+                'name': f'物品{i:07d}',
+                'category': category,
+                'total': total,
+                'in_stock': rng.randint(0, total),
+                'description': f'压测物品 {i}',
+                'created_at': now - timedelta(days=rng.randint(0, args.days)),
+                'updated_at': now
+            }
+    bulk_insert(Item.__table__, items(), args.items, args.chunk_size)
+
+    print(f'创建 {args.users} 个用户...')
+    # 所有合成用户共用同一个密码哈希，避免逐个计算
+    password_hash = generate_password_hash(args.password)
+    departments = [f'部门{i:03d}' for i in range(1, 201)]
+    usernames = [f'bench{i:06d}' for i in range(1, args.users + 1)]
+    bulk_insert(User.__table__, (
+        {
+            'username': username,
+            'password': password_hash,
+            'role': 'admin' if i == 0 else 'user',
+            'department': rng.choice(departments),
+            'created_at': now,
+            'updated_at': now,
+            'is_active': True
+        }
+        for i, username in enumerate(usernames)
+    ), args.users, args.chunk_size)
+
+    print(f'创建 {args.requests} 个申请...')
+
+    def requests():
+        for _ in range(args.requests):
+            item_id = rng.randint(1, args.items)
+            item_name, item_category = item_info[item_id - 1]
+            status = rng.choices(statuses, weights)[0]
+            quantity = rng.randint(1, 5)
+            created_at = now - timedelta(seconds=rng.randint(0, args.days * 86400))
+            handled = status != 'pending'
+            returned = status in ('returned', 'partially_returned')
+            yield {
+                'username': rng.choice(usernames),
+                'item_id': item_id,
+                'item_name': item_name,
+                'item_category': item_category,
+                'quantity': quantity,
+                'purpose': '压测申请',
+                'status': status,
+                'created_at': created_at,
+                'approved_at': created_at + timedelta(hours=1) if handled else None,
+                'approver': usernames[0] if handled else None,
+                'returned_quantity': quantity if status == 'returned' else (1 if returned else 0),
+                'returned_at': created_at + timedelta(days=rng.randint(1, 14)) if returned else None
+            }
+    bulk_insert(Request.__table__, requests(), args.requests, args.chunk_size)
+
+def main():
+    args = parse_args()
+    app = create_app()
+    with app.app_context():
+        try:
+            if not args.append:
+                print("重建数据库表...")
+                db.drop_all()
+            db.create_all()
+
+            started = time.perf_counter()
+            generate_data(args)
+            print(f"合成数据生成完成，总耗时 {time.perf_counter() - started:.1f} 秒")
+            print(f"压测账户: 用户名 bench000001（管理员）, 密码 {args.password}")
+        except Exception as e:
+            print(f"生成合成数据失败: {str(e)}")
+            db.session.rollback()
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
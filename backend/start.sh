@@ -18,8 +18,21 @@ pip install --upgrade pip
 echo "安装依赖..."
 pip install -r requirements.txt
 
+# 初始化数据库表结构（已存在时不会重复创建）
+echo "初始化数据库..."
+flask --app app init-db
+
+# 构建预压缩的前端静态资源
+echo "构建静态资源..."
+flask --app app build-assets
+
 # 启动服务
 echo "启动服务..."
 echo "服务将运行在 http://localhost:5001"
 echo "局域网内可通过 http://<本机IP>:5001 访问"
-python app.py
\ No newline at end of file
+if [ "$SERVER" = "gunicorn" ]; then
+    # 生产模式：多进程 + 多线程
+    gunicorn -c gunicorn.conf.py wsgi:app
+else
+    python app.py
+fi
\ No newline at end of file
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from extensions import db
+from models import Request, RequestArchive
+from utils.serializers import REQUEST_FIELDS
+
+# 可以归档的申请状态（不会再变化的终态）
+ARCHIVABLE_STATUSES = ('returned', 'rejected')
+
+
+def _archivable_condition(cutoff, max_id):
+    """超过保留期的终态申请
+
+    created_at 条件可以使用索引缩小范围；最后处理时间（归还或审批时间）
+    也必须早于截止时间。ID 最大的申请始终保留在热表中，避免 SQLite
+    在删除最大ID后重复使用该ID。
+    """
+    return db.and_(
+        Request.status.in_(ARCHIVABLE_STATUSES),
+        Request.created_at < cutoff,
+        db.func.coalesce(Request.returned_at, Request.approved_at, Request.created_at) < cutoff,
+        Request.id < max_id
+    )
+
+
+def archive_requests(retention_days=180, batch_size=1000, now=None, job=None):
+    """将超过保留期的已归还、已拒绝申请分批移动到归档表
+
+    每批在一个事务中先 INSERT ... SELECT 再 DELETE，返回移动的行数。
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=retention_days)
+    max_id = db.session.query(db.func.max(Request.id)).scalar()
+    if max_id is None:
+        return 0
+
+    condition = _archivable_condition(cutoff, max_id)
+    total = db.session.query(db.func.count(Request.id)).filter(condition).scalar() if job else 0
+    columns = [column.name for column in Request.__table__.columns]
+    moved = 0
+    last_id = 0
+
+    while True:
+        ids = [row[0] for row in db.session.query(Request.id)
+               .filter(condition, Request.id > last_id)
+               .order_by(Request.id)
+               .limit(batch_size)]
+        if not ids:
+            break
+
+        try:
+            select_stmt = db.select(
+                *[Request.__table__.c[name] for name in columns],
+                db.literal(now, db.DateTime).label('archived_at')
+            ).where(Request.id.in_(ids))
+            db.session.execute(RequestArchive.__table__.insert().from_select(columns + ['archived_at'], select_stmt))
+            db.session.execute(Request.__table__.delete().where(Request.id.in_(ids)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        moved += len(ids)
+        last_id = ids[-1]
+        if job:
+            job.progress(moved, total, f'已归档 {moved} 条申请')
+
+    return moved
+
+
+def _filtered_select(model, username=None, status=None):
+    table = model.__table__
+    stmt = db.select(*[table.c[field] for field in REQUEST_FIELDS])
+    if username:
+        stmt = stmt.where(table.c.username == username)
+    if status:
+        stmt = stmt.where(table.c.status == status)
+    return stmt
+
+
+def query_request_history(username=None, status=None):
+    """查询申请，包含已归档的申请，按创建时间倒序
+
+    只有状态筛选可能命中归档表时才查询归档表。
+    """
+    hot = _filtered_select(Request, username, status)
+    if status and status not in ARCHIVABLE_STATUSES:
+        stmt = hot.order_by(Request.created_at.desc())
+    else:
+        union = db.union_all(hot, _filtered_select(RequestArchive, username, status)).subquery()
+        stmt = db.select(union).order_by(union.c.created_at.desc())
+    return db.session.execute(stmt).all()
+
+
+def archived_status_counts():
+    """归档表中各状态的申请数量"""
+    return dict(
+        db.session.query(RequestArchive.status, db.func.count(RequestArchive.id))
+        .group_by(RequestArchive.status)
+        .all()
+    )
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from flask import abort, request, send_from_directory
+from utils.compression import compress, choose_encoding, is_compressible, supported_encodings
+
+# 构建目录中的清单文件：原始路径 -> {'path': 发布路径, 'hash': 内容摘要, 'encodings': [...]}
+MANIFEST_NAME = 'manifest.json'
+
+# 入口页面通过固定地址访问，不加指纹，每次使用前向服务端校验
+ENTRY_EXTENSIONS = ('.html',)
+
+# 带指纹的文件内容不会变化，可以长期缓存
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+_REFERENCE = re.compile(r'''((?:src|href)\s*=\s*["'])([^"'#?]+)''')
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _fingerprint(path, digest):
+    root, ext = os.path.splitext(path)
+    return f'{root}.{digest}{ext}'
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build_assets(source_dir, build_dir, min_size=1024, level=9):
+    """构建静态资源：加指纹、改写页面中的引用，并预先压缩
+
+    入口页面保持原文件名，其余文件以 `名称.摘要.扩展名` 发布；
+    可压缩且不小于 min_size 的文件同时生成 .gz（及 .br）版本。
+    返回清单字典。
+    """
+    source_dir = os.path.abspath(source_dir)
+    build_dir = os.path.abspath(build_dir)
+    if os.path.isdir(build_dir):
+        shutil.rmtree(build_dir)
+
+    files = []
+    for root, dirs, names in os.walk(source_dir):
+        # 构建目录位于源目录内时跳过
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != build_dir]
+        for name in names:
+            files.append(os.path.relpath(os.path.join(root, name), source_dir).replace(os.sep, '/'))
+
+    manifest = {}
+    fingerprinted = {}
+    # 先处理被引用的资源，得到指纹文件名后再改写入口页面
+    for path in sorted(files, key=lambda p: p.endswith(ENTRY_EXTENSIONS)):
+        with open(os.path.join(source_dir, path), 'rb') as f:
+            data = f.read()
+
+        if path.endswith(ENTRY_EXTENSIONS):
+            text = data.decode('utf-8')
+            text = _REFERENCE.sub(lambda m: m.group(1) + fingerprinted.get(m.group(2).lstrip('/'), m.group(2)), text)
+            data = text.encode('utf-8')
+            published = path
+        else:
+            published = _fingerprint(path, _digest(data))
+            fingerprinted[path] = published
+
+        target = os.path.join(build_dir, published)
+        _write(target, data)
+
+        encodings = []
+        if len(data) >= min_size and is_compressible(mimetypes.guess_type(path)[0]):
+            for encoding in supported_encodings():
+                _write(target + ENCODING_SUFFIXES[encoding], compress(data, encoding, level))
+                encodings.append(encoding)
+
+        manifest[path] = {'path': published, 'hash': _digest(data), 'encodings': encodings}
+
+    _write(os.path.join(build_dir, MANIFEST_NAME), json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    return manifest
+
+
+class StaticAssets:
+    """提供静态文件：有构建结果时使用预压缩的构建文件，否则直接读取源目录"""
+
+    def __init__(self, source_dir, build_dir):
+        self.source_dir = source_dir
+        self.build_dir = build_dir
+        self.manifest = {}
+        self.published = {}
+        self.load()
+
+    def load(self):
+        manifest_path = os.path.join(self.build_dir, MANIFEST_NAME)
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path, encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.published = {entry['path']: entry for entry in self.manifest.values()}
+
+    def send(self, path):
+        if not self.published:
+            return send_from_directory(self.source_dir, path)
+
+        entry = self.published.get(path)
+        if entry is None:
+            # 未加指纹的旧地址仍可访问，但不能长期缓存
+            source_entry = self.manifest.get(path)
+            if source_entry is None:
+                abort(404)
+            entry = source_entry
+        immutable = entry['path'] == path and not path.endswith(ENTRY_EXTENSIONS)
+
+        encoding = choose_encoding(request.accept_encodings) if entry['encodings'] else None
+        if encoding not in entry['encodings']:
+            encoding = None
+        filename = entry['path'] + ENCODING_SUFFIXES[encoding] if encoding else entry['path']
+
+        response = send_from_directory(
+            self.build_dir,
+            filename,
+            mimetype=mimetypes.guess_type(entry['path'])[0] or 'application/octet-stream',
+            etag=f"{entry['hash']}-{encoding or 'identity'}",
+            max_age=IMMUTABLE_MAX_AGE if immutable else None
+        )
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if entry['encodings']:
+            response.vary.add('Accept-Encoding')
+        if immutable:
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
@@ -0,0 +1,118 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from models import Log
+
+logger = logging.getLogger(__name__)
+
+# Log 表中可写入的列
+LOG_FIELDS = ('user_id', 'username', 'action', 'target_type', 'target_id',
+              'details', 'ip_address', 'user_agent', 'created_at')
+
+
+class AuditWriter:
+    """异步批量写入审计日志
+
+    请求线程只把日志放入有界队列，由后台线程按 batch_size 条或每
+    flush_interval 毫秒批量插入。队列满时丢弃新日志并计数，保证内存有界；
+    进程退出时会写完队列中剩余的日志。同步模式下直接写库，用于测试。
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.sync = False
+        self.batch_size = 200
+        self.flush_interval = 0.2
+        self.dropped = 0
+        self._queue = None
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def init_app(self, app, db):
+        """根据应用配置初始化，异步模式下启动后台线程"""
+        with app.app_context():
+            self.engine = db.engine
+        self.sync = app.config['AUDIT_SYNC']
+        self.batch_size = app.config['AUDIT_BATCH_SIZE']
+        self.flush_interval = app.config['AUDIT_FLUSH_INTERVAL_MS'] / 1000.0
+        self._queue = queue.Queue(maxsize=app.config['AUDIT_QUEUE_SIZE'])
+
+        if not self.sync:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def write(self, **fields):
+        """记录一条审计日志"""
+        row = {key: fields.get(key) for key in LOG_FIELDS}
+        if row['created_at'] is None:
+            row['created_at'] = datetime.utcnow()
+
+        if self.sync or self._thread is None:
+            self._insert([row])
+            return
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f'审计日志队列已满，已丢弃 {self.dropped} 条')
+
+    def _insert(self, rows):
+        with self.engine.begin() as conn:
+            conn.execute(Log.__table__.insert(), rows)
+
+    def _drain(self, first):
+        """收集一批日志：最多 batch_size 条，或自第一条起最多等待 flush_interval"""
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = self._drain(first)
+            try:
+                self._insert(batch)
+            except Exception as e:
+                logger.error(f'写入审计日志失败（{len(batch)} 条）: {str(e)}')
+
+    def flush(self):
+        """同步写入队列中已有的日志"""
+        rows = []
+        while True:
+            try:
+                rows.append(self._queue.get_nowait())
+            except (queue.Empty, AttributeError):
+                break
+        if rows:
+            self._insert(rows)
+
+    def shutdown(self, timeout=5.0):
+        """停止后台线程并写完剩余日志"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+
+audit_writer = AuditWriter()
+
+
+def audit_log(**fields):
+    """记录审计日志，字段同 Log 模型"""
+    audit_writer.write(**fields)
@@ -0,0 +1,125 @@
+import gzip
+import zlib
+from flask import request
+
+# brotli 为可选依赖，未安装时只使用 gzip
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# 值得压缩的内容类型（图片、压缩包等已压缩的格式不再压缩）
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def supported_encodings():
+    """服务端支持的编码，按优先级排序"""
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def choose_encoding(accept_encodings):
+    """根据 Accept-Encoding 选择编码，客户端不接受压缩时返回 None"""
+    best, best_quality = None, 0
+    for encoding in supported_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(data, encoding, level=6):
+    """一次性压缩完整内容"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(level, 11))
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level=6):
+    """逐块压缩流式响应
+
+    每块数据都立即刷新输出，客户端可以及时收到已生成的部分
+    （如 SSE 事件），而不必等压缩缓冲区填满。
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip 格式
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def _should_compress(response):
+    if request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 206):
+        return False
+    # 重定向（包括由 HTTPException 生成的 308 等响应）内容很短，不压缩
+    if 300 <= response.status_code < 400:
+        return False
+    if 'Content-Encoding' in response.headers or 'Content-Range' in response.headers:
+        return False
+    return is_compressible(response.mimetype)
+
+
+def init_compression(app):
+    """按 Accept-Encoding 压缩响应
+
+    普通响应超过 COMPRESS_MIN_SIZE 时整体压缩；流式响应和文件响应逐块
+    压缩，不把整个内容读入内存，已知长度且小于 COMPRESS_MIN_SIZE 时不压缩。
+    已设置 Content-Encoding 的响应（如预压缩的静态文件）不再处理。
+    """
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    level = app.config['COMPRESS_LEVEL']
+
+    @app.after_request
+    def compress_response(response):
+        if not _should_compress(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed or response.direct_passthrough:
+            length = response.content_length
+            if length is not None and length < min_size:
+                return response
+            body = response.response
+            # 替换响应体后原来的文件不会随响应关闭，需要单独关闭
+            if hasattr(body, 'close'):
+                response.call_on_close(body.close)
+            response.direct_passthrough = False
+            response.response = compress_stream(body, encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < min_size:
+                return response
+            response.set_data(compress(data, encoding, level))
+
+        response.headers['Content-Encoding'] = encoding
+        # 压缩后内容不同，ETag 改为弱校验，仍可与原 ETag 匹配返回 304
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
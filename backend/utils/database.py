@@ -0,0 +1,64 @@
+from sqlalchemy import event
+
+
+def configure_sqlite(engine, config):
+    """为SQLite连接设置PRAGMA，非SQLite数据库时不做处理
+
+    WAL模式下读操作不会被写操作阻塞；busy_timeout 让写冲突时等待而不是
+    立即报错；synchronous=NORMAL 在WAL模式下仍可保证崩溃一致性，
+    同时减少fsync次数；mmap_size 和 cache_size 减少读盘。
+    """
+    if engine.url.get_backend_name() != 'sqlite':
+        return False
+
+    pragmas = {
+        'journal_mode': config['SQLITE_JOURNAL_MODE'],
+        'busy_timeout': config['SQLITE_BUSY_TIMEOUT_MS'],
+        'synchronous': config['SQLITE_SYNCHRONOUS'],
+        'mmap_size': config['SQLITE_MMAP_SIZE'],
+        'cache_size': config['SQLITE_CACHE_SIZE'],
+    }
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    return True
+
+
+def add_missing_columns(engine, metadata):
+    """为已存在的表补充模型中新增的列和索引，返回补充的列名列表
+
+    create_all 只创建不存在的表；项目没有迁移工具，升级后由 `flask init-db`
+    调用本函数。非空列使用模型上的标量默认值作为 DEFAULT，已有行随之填充。
+    """
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    ddl += f' DEFAULT {str(default).upper() if isinstance(default, bool) else repr(default)}'
+                if not column.nullable and default is not None:
+                    ddl += ' NOT NULL'
+                conn.execute(text(ddl))
+                added.append(f'{table.name}.{column.name}')
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    return added
@@ -0,0 +1,248 @@
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime, date
+from extensions import db
+
+# 转储格式标识和版本；版本2在文件头中记录包含的表和省略的列
+DUMP_FORMAT = 'warehouse-dump'
+DUMP_VERSION = 2
+
+# 默认不导出的敏感列，导出时需显式要求才包含
+SENSITIVE_COLUMNS = {
+    'user': ('password',),
+}
+
+# 每次从数据库读取/批量插入的行数
+DUMP_CHUNK_SIZE = 1000
+
+# 压缩缓冲区达到该大小时输出一个数据块
+DUMP_FLUSH_BYTES = 64 * 1024
+
+
+def _encode_value(value):
+    """将数据库值转换为可JSON序列化的值"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_row(table, columns, row):
+    """将转储中的一行还原为可插入的字典"""
+    result = {}
+    for name, value in zip(columns, row):
+        column = table.columns.get(name)
+        if column is None:
+            # 忽略目标库中不存在的列
+            continue
+        if value is not None and isinstance(column.type, db.DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column.type, db.Date):
+            value = date.fromisoformat(value)
+        result[name] = value
+    return result
+
+
+def _dump_tables(tables=None):
+    """按外键依赖顺序返回需要转储的表"""
+    sorted_tables = db.metadata.sorted_tables
+    if tables:
+        return [table for table in sorted_tables if table.name in tables]
+    return sorted_tables
+
+
+def _dump_columns(table, include_secrets):
+    excluded = () if include_secrets else SENSITIVE_COLUMNS.get(table.name, ())
+    return [column for column in table.columns if column.name not in excluded]
+
+
+def iter_dump_lines(tables=None, include_secrets=False):
+    """逐行生成NDJSON转储内容
+
+    每张表为一个分段：分段头记录表名和列名，随后每行是一个值数组，
+    最后是记录行数的分段尾，整个过程不会把整张表载入内存。
+    include_secrets 为 False 时不导出 SENSITIVE_COLUMNS 中的列（如用户密码）。
+    """
+    dump_tables = _dump_tables(tables)
+    yield json.dumps({
+        'format': DUMP_FORMAT,
+        'version': DUMP_VERSION,
+        'created_at': datetime.utcnow().isoformat(),
+        'tables': [table.name for table in dump_tables],
+        'omitted_columns': {} if include_secrets else {
+            table.name: list(SENSITIVE_COLUMNS[table.name])
+            for table in dump_tables if table.name in SENSITIVE_COLUMNS
+        }
+    }, ensure_ascii=False) + '\n'
+
+    for table in dump_tables:
+        dump_columns = _dump_columns(table, include_secrets)
+        columns = [column.name for column in dump_columns]
+        yield json.dumps({'section': table.name, 'columns': columns}, ensure_ascii=False) + '\n'
+
+        row_count = 0
+        stmt = db.select(*dump_columns).order_by(*table.primary_key.columns)
+        result = db.session.execute(stmt.execution_options(yield_per=DUMP_CHUNK_SIZE))
+        for row in result:
+            yield json.dumps([_encode_value(value) for value in row], ensure_ascii=False) + '\n'
+            row_count += 1
+
+        yield json.dumps({'end': table.name, 'rows': row_count}) + '\n'
+
+
+def iter_dump(tables=None, compresslevel=6, include_secrets=False):
+    """生成gzip压缩的转储数据块，用于流式响应"""
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 31)
+    buffer = []
+    buffered = 0
+
+    for line in iter_dump_lines(tables, include_secrets):
+        chunk = compressor.compress(line.encode('utf-8'))
+        if chunk:
+            buffer.append(chunk)
+            buffered += len(chunk)
+        if buffered >= DUMP_FLUSH_BYTES:
+            yield b''.join(buffer)
+            buffer = []
+            buffered = 0
+
+    buffer.append(compressor.flush())
+    yield b''.join(buffer)
+
+
+def write_dump(fileobj, tables=None, include_secrets=False):
+    """将转储写入文件对象，返回写入的字节数"""
+    size = 0
+    for chunk in iter_dump(tables, include_secrets=include_secrets):
+        fileobj.write(chunk)
+        size += len(chunk)
+    return size
+
+
+def _reset_sequences(table_names):
+    """PostgreSQL按显式主键插入后，序列不会前进，需要重置到当前最大值"""
+    bind = db.session.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    for name in table_names:
+        table = db.metadata.tables[name]
+        for column in table.primary_key.columns:
+            if not column.autoincrement or not isinstance(column.type, db.Integer):
+                continue
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', '{column.name}'), "
+                f"COALESCE((SELECT MAX({column.name}) FROM {table.name}), 0) + 1, false)"
+            ))
+
+
+def _scan_sections(fileobj):
+    """读取旧版本转储中的全部分段名，读取后回到文件开头"""
+    names = []
+    stream = io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj, mode='rb'), encoding='utf-8')
+    for line in stream:
+        if line.startswith('{"section"'):
+            names.append(json.loads(line)['section'])
+    stream.detach()
+    fileobj.seek(0)
+    return names
+
+
+def _missing_required_columns(table, columns):
+    """返回转储中缺少的、没有默认值的必填列"""
+    return [
+        column.name for column in table.columns
+        if column.name not in columns and not column.nullable and not column.primary_key
+        and column.default is None and column.server_default is None
+    ]
+
+
+def _check_required_columns(table, columns):
+    """转储缺少没有默认值的必填列时无法插入，提前报错"""
+    missing = _missing_required_columns(table, columns)
+    if missing:
+        raise ValueError(f'转储中的 {table.name} 表缺少必填列 {", ".join(missing)}，无法恢复')
+
+
+def _skipped_tables(header):
+    """导出时省略了必填列（如未导出密码的 user 表）的表无法恢复，返回 表名 -> 缺少的列"""
+    skipped = {}
+    for name, omitted in header.get('omitted_columns', {}).items():
+        table = db.metadata.tables.get(name)
+        if table is None:
+            continue
+        missing = _missing_required_columns(table, [column.name for column in table.columns if column.name not in omitted])
+        if missing:
+            skipped[name] = missing
+    return skipped
+
+
+def restore_dump(fileobj, replace=True, chunk_size=DUMP_CHUNK_SIZE):
+    """从gzip压缩的转储恢复数据
+
+    按分段逐行读取，并以chunk_size为单位批量插入；replace为True时
+    先按依赖的逆序清空转储中包含的表，其他表保持不变。导出时省略了
+    必填列的表（默认导出的 user 表没有密码）跳过，不清空也不恢复。
+    全部成功后才提交事务。返回 (每张表恢复的行数, 跳过的表 -> 缺少的列)。
+    """
+    header_stream = io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj, mode='rb'), encoding='utf-8')
+    header = json.loads(header_stream.readline() or '{}')
+    header_stream.detach()
+    if header.get('format') != DUMP_FORMAT:
+        raise ValueError('不是有效的转储文件')
+    if header.get('version', 0) > DUMP_VERSION:
+        raise ValueError(f'不支持的转储版本: {header.get("version")}')
+    fileobj.seek(0)
+
+    # 版本1的文件头没有记录表名，需要先扫描一遍
+    section_names = set(header['tables'] if 'tables' in header else _scan_sections(fileobj))
+    skipped = _skipped_tables(header)
+    section_names -= set(skipped)
+
+    stream = io.TextIOWrapper(gzip.GzipFile(fileobj=fileobj, mode='rb'), encoding='utf-8')
+    stream.readline()
+    tables = db.metadata.tables
+    restored = {}
+
+    try:
+        if replace:
+            for table in reversed(db.metadata.sorted_tables):
+                if table.name in section_names:
+                    db.session.execute(table.delete())
+
+        table = None
+        columns = []
+        batch = []
+
+        for line in stream:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+
+            if isinstance(record, list):
+                if table is not None:
+                    batch.append(_decode_row(table, columns, record))
+                    if len(batch) >= chunk_size:
+                        db.session.execute(table.insert(), batch)
+                        restored[table.name] += len(batch)
+                        batch = []
+            elif 'section' in record:
+                table = tables.get(record['section']) if record['section'] not in skipped else None
+                columns = record['columns']
+                if table is not None:
+                    _check_required_columns(table, columns)
+                    restored[table.name] = 0
+            elif 'end' in record:
+                if table is not None and batch:
+                    db.session.execute(table.insert(), batch)
+                    restored[table.name] += len(batch)
+                table = None
+                batch = []
+
+        _reset_sequences(restored)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return restored, skipped
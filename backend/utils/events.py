@@ -0,0 +1,177 @@
+import json
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# 事件类型
+REQUEST_CREATED = 'request.created'
+REQUEST_APPROVED = 'request.approved'
+REQUEST_REJECTED = 'request.rejected'
+REQUEST_RETURNED = 'request.returned'
+ITEM_STOCK_CHANGED = 'item.stock_changed'
+ITEM_LOW_STOCK = 'item.low_stock'
+
+
+class Event:
+    """一条推送事件，username 为空表示推送给所有用户，admin_only 表示只推送给管理员"""
+
+    __slots__ = ('id', 'type', 'data', 'username', 'admin_only', 'created_at')
+
+    def __init__(self, event_id, event_type, data, username=None, admin_only=False):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+        self.username = username
+        self.admin_only = admin_only
+        self.created_at = datetime.utcnow()
+
+    def visible_to(self, username, is_admin):
+        """管理员接收全部事件，普通用户只接收广播和自己的事件"""
+        if is_admin:
+            return True
+        if self.admin_only:
+            return False
+        return self.username is None or self.username == username
+
+    def to_sse(self):
+        """格式化为 Server-Sent Events 消息"""
+        payload = json.dumps({
+            'type': self.type,
+            'data': self.data,
+            'created_at': self.created_at.isoformat()
+        }, ensure_ascii=False)
+        return f'id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n'
+
+
+class Subscription:
+    """一个SSE连接的订阅，事件放入有界队列，消费过慢时丢弃最旧的事件"""
+
+    def __init__(self, username, is_admin, max_pending):
+        self.username = username
+        self.is_admin = is_admin
+        self.queue = queue.Queue(maxsize=max_pending)
+
+    def offer(self, event):
+        if not event.visible_to(self.username, self.is_admin):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(event)
+
+
+class EventHub:
+    """进程内发布/订阅中心
+
+    写操作提交后调用 publish 发布事件；最近的 history_size 条事件保存在
+    环形缓冲区中，客户端断线重连时按 Last-Event-ID 补发。
+
+    事件只在发布它的进程内分发：gunicorn 多工作进程部署时，客户端收不到
+    其他进程中发布的事件，事件只能作为刷新提示，不能代替数据查询。
+    """
+
+    def __init__(self, history_size=1000, max_pending=100, max_streams=2, max_age=300):
+        self.max_pending = max_pending
+        # 每个进程同时保持的连接数上限：每个连接在流式响应期间占用一个工作线程
+        self.max_streams = max_streams
+        # 单个连接的最长保持时间（秒），到期后断开，由浏览器带 Last-Event-ID 重连
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._history = deque(maxlen=history_size)
+        self._subscriptions = set()
+
+    def publish(self, event_type, data, username=None, admin_only=False):
+        """发布事件，返回事件对象"""
+        with self._lock:
+            event = Event(self._next_id, event_type, data, username, admin_only)
+            self._next_id += 1
+            self._history.append(event)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.offer(event)
+        return event
+
+    def init_app(self, app):
+        self.max_streams = app.config['EVENT_MAX_STREAMS']
+        self.max_age = app.config['EVENT_STREAM_MAX_AGE']
+
+    def subscribe(self, username, is_admin, last_event_id=None):
+        """创建订阅，返回 (订阅, 需要补发的事件列表)
+
+        连接数已达上限时返回 (None, [])。
+        """
+        subscription = Subscription(username, is_admin, self.max_pending)
+        with self._lock:
+            if self.max_streams and len(self._subscriptions) >= self.max_streams:
+                return None, []
+            self._subscriptions.add(subscription)
+            missed = []
+            if last_event_id is not None:
+                missed = [
+                    event for event in self._history
+                    if event.id > last_event_id and event.visible_to(username, is_admin)
+                ]
+        return subscription, missed
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def stream(self, subscription, missed, keepalive=15):
+        """生成SSE响应内容，空闲时定期发送注释行保持连接
+
+        连接保持 max_age 秒后结束，释放工作线程；浏览器会自动重连，
+        并通过 Last-Event-ID 补发期间的事件。
+        """
+        deadline = time.monotonic() + self.max_age if self.max_age else None
+        try:
+            yield 'retry: 3000\n\n'
+            for event in missed:
+                yield event.to_sse()
+            while deadline is None or time.monotonic() < deadline:
+                timeout = keepalive if deadline is None else max(0.0, min(keepalive, deadline - time.monotonic()))
+                try:
+                    event = subscription.queue.get(timeout=timeout)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield event.to_sse()
+        finally:
+            self.unsubscribe(subscription)
+
+
+event_hub = EventHub()
+
+
+def publish_request_event(event_type, req):
+    """发布申请状态变化事件，推送给申请人和管理员"""
+    event_hub.publish(event_type, {
+        'id': req.id,
+        'username': req.username,
+        'item_id': req.item_id,
+        'quantity': req.quantity,
+        'status': req.status
+    }, username=req.username)
+
+
+def publish_stock_event(item):
+    """发布物品库存变化事件，推送给所有用户"""
+    event_hub.publish(ITEM_STOCK_CHANGED, {
+        'id': item.id,
+        'name': item.name,
+        'total': item.total,
+        'in_stock': item.in_stock,
+        'low_stock': item.low_stock
+    })
+
+
+def publish_low_stock_event(alert):
+    """发布物品低库存状态变化事件，只推送给管理员"""
+    event_hub.publish(ITEM_LOW_STOCK, alert, admin_only=True)
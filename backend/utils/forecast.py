@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from extensions import db
+from models import Item, ItemCategory, Request, RequestArchive
+
+# 计算移动平均的天数
+MOVING_AVERAGE_DAYS = (7, 30)
+
+# 占用库存的申请状态；已归还的申请在归还日计为库存回流
+CONSUMING_STATUSES = ('approved', 'partially_returned', 'returned')
+
+
+def _history_select(model, start):
+    table = model.__table__
+    return db.select(
+        table.c.item_id, table.c.quantity, table.c.status, table.c.approved_at, table.c.returned_at
+    ).where(
+        table.c.status.in_(CONSUMING_STATUSES),
+        db.or_(table.c.approved_at >= start, table.c.returned_at >= start)
+    )
+
+
+def load_history(pd, start):
+    """按列读取 start 之后有出库或归还的申请，包含已归档的申请"""
+    stmt = db.union_all(_history_select(Request, start), _history_select(RequestArchive, start))
+    result = db.session.execute(stmt)
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def load_items(pd):
+    """按列读取物品的当前库存和生效的最低库存"""
+    stmt = (
+        db.select(
+            Item.id, Item.name, Item.category, Item.total, Item.in_stock,
+            db.func.coalesce(Item.min_stock, ItemCategory.default_min_stock, 0).label('min_stock')
+        )
+        .outerjoin(ItemCategory, ItemCategory.name == Item.category)
+    )
+    result = db.session.execute(stmt)
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys())).set_index('id')
+
+
+def compute_forecast(window_days=90, lead_days=14, now=None):
+    """计算每个物品的消耗速度和预计售罄时间
+
+    申请历史读入 DataFrame 后按物品分组一次性计算，不逐个物品查询：
+    每日净消耗 = 批准出库数量 - 归还数量；avg_daily 为整个窗口内的日均值，
+    ma_7、ma_30 为最近 7 天、30 天的移动平均。预计售罄天数按 ma_30 计算，
+    建议补货量使提前期 lead_days 之后库存仍不低于最低库存。
+    """
+    import numpy as np
+    import pandas as pd
+
+    now = now or datetime.utcnow()
+    today = pd.Timestamp(now).normalize()
+    start = today - pd.Timedelta(days=window_days - 1)
+
+    items = load_items(pd)
+    history = load_history(pd, start.to_pydatetime())
+
+    # 出库记在批准日，归还记在归还日（负数），合并为一列流水
+    approved = history[history['approved_at'].notna()]
+    returned = history[(history['status'] == 'returned') & history['returned_at'].notna()]
+    flows = pd.DataFrame({
+        'item_id': np.concatenate([approved['item_id'].to_numpy(), returned['item_id'].to_numpy()]),
+        'day': pd.to_datetime(np.concatenate([
+            approved['approved_at'].to_numpy(), returned['returned_at'].to_numpy()
+        ])).normalize(),
+        'quantity': np.concatenate([
+            approved['quantity'].to_numpy(dtype=float), -returned['quantity'].to_numpy(dtype=float)
+        ])
+    })
+    flows = flows[(flows['day'] >= start) & (flows['day'] <= today)]
+    age = (today - flows['day']).dt.days
+
+    # 每个窗口只需要一次按物品求和，窗口内没有记录的物品为 0
+    grouped = {'avg_daily': (flows['quantity'], window_days)}
+    for days in MOVING_AVERAGE_DAYS:
+        grouped[f'ma_{days}'] = (flows['quantity'].where(age < days, 0.0), min(days, window_days))
+    for column, (quantities, days) in grouped.items():
+        sums = quantities.groupby(flows['item_id']).sum()
+        items[column] = sums.reindex(items.index, fill_value=0.0).to_numpy() / days
+
+    rate = items['ma_30'].to_numpy()
+    in_stock = items['in_stock'].to_numpy(dtype=float)
+    min_stock = items['min_stock'].to_numpy(dtype=float)
+    consuming = rate > 0
+
+    days_left = np.full(len(items), np.nan)
+    np.divide(in_stock, rate, out=days_left, where=consuming)
+    items['days_until_stockout'] = np.round(days_left, 1)
+    items['reorder_quantity'] = np.ceil(
+        np.maximum(0.0, np.where(consuming, rate, 0.0) * lead_days + min_stock - in_stock)
+    ).astype(int)
+    for column in grouped:
+        items[column] = items[column].round(3)
+
+    items = items.sort_values(['days_until_stockout', 'in_stock'], na_position='last').reset_index()
+    records = items.astype(object).where(items.notna(), None).to_dict('records')
+    for record in records:
+        days = record['days_until_stockout']
+        record['stockout_date'] = (now + timedelta(days=days)).strftime('%Y-%m-%d') if days is not None else None
+
+    return {
+        'computed_at': now.isoformat(),
+        'window_days': window_days,
+        'lead_days': lead_days,
+        'items': records
+    }
+
+
+class ForecastCache:
+    """预测结果缓存
+
+    结果写入 JSON 文件，多个工作进程共享同一份结果；读取时只比较文件
+    修改时间，文件未变化时直接使用进程内已解析的结果。
+    """
+
+    def __init__(self):
+        self.path = None
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._data = None
+
+    def init_app(self, app):
+        self.path = app.config['FORECAST_CACHE_FILE']
+
+    def get(self):
+        """返回缓存的预测结果，没有缓存时返回 None"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return None
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path, encoding='utf-8') as f:
+                    self._data = json.load(f)
+                self._mtime = mtime
+            return self._data
+
+    def save(self, data):
+        """写入临时文件后替换，读取方不会读到写了一半的文件"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        with self._lock:
+            self._data = data
+            self._mtime = os.path.getmtime(self.path)
+        return data
+
+
+forecast_cache = ForecastCache()
+
+
+def refresh_forecast(app):
+    """按配置重新计算预测并写入缓存"""
+    data = compute_forecast(app.config['FORECAST_WINDOW_DAYS'], app.config['FORECAST_LEAD_DAYS'])
+    return forecast_cache.save(data)
+
+
+def _seconds_until(hour, now=None):
+    now = now or datetime.now()
+    next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+def start_forecast_scheduler(app):
+    """每天 FORECAST_HOUR 点（本地时间）重新计算预测的后台线程，小于0时不启动"""
+    hour = app.config['FORECAST_HOUR']
+    if hour < 0:
+        return None
+
+    def run():
+        while True:
+            time.sleep(_seconds_until(hour))
+            try:
+                with app.app_context():
+                    data = refresh_forecast(app)
+                app.logger.info(f'库存预测完成: {len(data["items"])} 个物品')
+            except Exception as e:
+                app.logger.error(f'库存预测失败: {str(e)}')
+
+    thread = threading.Thread(target=run, name='forecast-scheduler', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import jsonify, request
+from werkzeug.utils import secure_filename
+from extensions import db
+from models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+# 两次进度写入之间的最小间隔（秒），避免频繁更新任务表
+PROGRESS_INTERVAL = 1.0
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobContext:
+    """传给任务函数的上下文，用于报告进度和保存结果文件"""
+
+    def __init__(self, runner, job_id):
+        self.runner = runner
+        self.job_id = job_id
+        self.result_file = None
+        self._reported_at = 0.0
+
+    def progress(self, done, total=100, message=None):
+        """报告进度
+
+        进度通过独立连接写入任务表；SQLite 同一时间只允许一个写事务，
+        因此任务函数应在提交当前事务之后再调用。
+        """
+        now = time.monotonic()
+        if done < total and now - self._reported_at < PROGRESS_INTERVAL:
+            return
+        self._reported_at = now
+        values = {'progress': min(100, int(done * 100 / total)) if total else 100}
+        if message is not None:
+            values['message'] = message
+        self.runner.update(self.job_id, **values)
+
+    def open_result(self, filename, mode='w'):
+        """打开结果文件，任务完成后可通过 /api/jobs/<id>/download 下载"""
+        os.makedirs(self.runner.result_dir, exist_ok=True)
+        self.result_file = f'{self.job_id}_{secure_filename(filename) or "result"}'
+        path = os.path.join(self.runner.result_dir, self.result_file)
+        if 'b' in mode:
+            return open(path, mode)
+        return open(path, mode, encoding='utf-8')
+
+
+class JobRunner:
+    """进程内后台任务执行器
+
+    任务记录保存在 Job 表中，由线程池执行；接口提交任务后立即返回任务ID，
+    客户端轮询 /api/jobs/<id> 获取进度和结果。任务函数通过 job 装饰器注册，
+    第一个参数为 JobContext，其余参数来自提交时的 params，返回值保存为
+    JSON 结果。
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.app = None
+        self.engine = None
+        self.result_dir = None
+        self.max_workers = 2
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def job(self, name):
+        """注册任务函数"""
+        def decorator(f):
+            self.handlers[name] = f
+            return f
+        return decorator
+
+    def init_app(self, app, db):
+        self.app = app
+        with app.app_context():
+            self.engine = db.engine
+        self.result_dir = app.config['JOB_RESULT_DIR']
+        self.max_workers = app.config['JOB_WORKERS']
+
+    @staticmethod
+    def worker_id():
+        return f'{socket.gethostname()}:{os.getpid()}'
+
+    def _get_executor(self):
+        # 首次提交时创建线程池；多进程部署时每个进程各自创建
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def update(self, job_id, **values):
+        """使用独立连接更新任务记录，不影响调用方的会话事务"""
+        with self.engine.begin() as conn:
+            conn.execute(Job.__table__.update().where(Job.__table__.c.id == job_id).values(**values))
+
+    def submit(self, job_type, params=None, username=None):
+        """创建任务记录并提交执行，返回任务ID"""
+        if job_type not in self.handlers:
+            raise ValueError(f'未知的任务类型: {job_type}')
+        with self.engine.begin() as conn:
+            job_id = conn.execute(Job.__table__.insert().values(
+                type=job_type,
+                status=JOB_PENDING,
+                progress=0,
+                params=json.dumps(params or {}, ensure_ascii=False),
+                username=username,
+                worker=self.worker_id(),
+                created_at=datetime.utcnow()
+            )).inserted_primary_key[0]
+        self._get_executor().submit(self._run, job_id, job_type, params or {})
+        return job_id
+
+    def _run(self, job_id, job_type, params):
+        with self.app.app_context():
+            self.update(job_id, status=JOB_RUNNING, started_at=datetime.utcnow())
+            context = JobContext(self, job_id)
+            try:
+                result = self.handlers[job_type](context, **params)
+                self.update(
+                    job_id,
+                    status=JOB_SUCCEEDED,
+                    progress=100,
+                    result=self.app.json.dumps(result) if result is not None else None,
+                    result_file=context.result_file,
+                    finished_at=datetime.utcnow()
+                )
+            except Exception as e:
+                db.session.rollback()
+                logger.exception(f'任务 {job_id} ({job_type}) 执行失败')
+                self.update(job_id, status=JOB_FAILED, error=str(e), finished_at=datetime.utcnow())
+
+    def check_stale(self, job):
+        """执行任务的进程已退出（如服务重启）时，将未完成的任务标记为失败"""
+        if job.status not in (JOB_PENDING, JOB_RUNNING) or not job.worker:
+            return job
+        host, _, pid = job.worker.rpartition(':')
+        if host != socket.gethostname() or not pid.isdigit() or _pid_alive(int(pid)):
+            return job
+        self.update(job.id, status=JOB_FAILED, error='执行任务的进程已退出', finished_at=datetime.utcnow())
+        job.status = JOB_FAILED
+        job.error = '执行任务的进程已退出'
+        return job
+
+    def result_path(self, job):
+        if not job.result_file:
+            return None
+        return os.path.join(self.result_dir, job.result_file)
+
+    def prune(self, days):
+        """删除超过保留天数的已完成任务及其结果文件，返回删除的任务数"""
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        jobs = Job.query.filter(Job.status.in_([JOB_SUCCEEDED, JOB_FAILED]), Job.created_at < cutoff).all()
+        for job in jobs:
+            path = self.result_path(job)
+            if path and os.path.exists(path):
+                os.remove(path)
+            db.session.delete(job)
+        db.session.commit()
+        return len(jobs)
+
+
+job_runner = JobRunner()
+
+
+def serialize_job(job):
+    """任务转换为字典"""
+    return {
+        'id': job.id,
+        'type': job.type,
+        'status': job.status,
+        'progress': job.progress,
+        'message': job.message,
+        'result': json.loads(job.result) if job.result else None,
+        'has_file': bool(job.result_file),
+        'error': job.error,
+        'username': job.username,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at
+    }
+
+
+def wants_async():
+    """请求参数 async=1 时以后台任务方式执行"""
+    return request.args.get('async', '').lower() in ('1', 'true', 'yes')
+
+
+def job_submitted(job_id):
+    """任务提交成功的响应"""
+    return jsonify({
+        'code': 202,
+        'data': {
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        },
+        'message': '任务已提交'
+    }), 202
@@ -0,0 +1,76 @@
+import dataclasses
+import decimal
+from collections.abc import Mapping
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider, _default as flask_default
+
+# orjson 为可选依赖，未安装时退回标准库 json
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def json_default(obj):
+    """序列化 JSON 原生不支持的类型
+
+    orjson 会原生处理 datetime/date/UUID/dataclass，这里只需处理其余类型；
+    标准库 json 则需要这里把日期统一转成 ISO 8601 字符串。
+    """
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    # SQLAlchemy 查询结果行：RowMapping 是映射，Row 通过 _mapping 访问
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if hasattr(obj, '_mapping'):
+        return dict(obj._mapping)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    return flask_default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """基于 orjson 的 JSON 序列化
+
+    日期时间输出为 ISO 8601 字符串，与各接口手动调用 isoformat() 的结果
+    一致，因此接口可以直接返回 datetime 和查询结果行。未安装 orjson 或
+    调用方传入标准库专用参数时使用标准库 json。
+    """
+
+    default = staticmethod(json_default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        option = ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        # 直接使用字节作为响应体，省去一次解码和编码
+        return self._app.response_class(self._orjson_dumps(obj, option), mimetype=self.mimetype)
+
+    def _orjson_dumps(self, obj, option):
+        try:
+            return orjson.dumps(obj, default=self.default, option=option)
+        except orjson.JSONEncodeError:
+            # orjson 不支持的情况（如超过64位的整数）交给标准库处理
+            return super().dumps(obj, separators=(',', ':')).encode('utf-8')
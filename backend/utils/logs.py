@@ -0,0 +1,154 @@
+import base64
+from datetime import datetime, timedelta
+from extensions import db
+from models import Log
+
+# 单页最大条数
+MAX_PAGE_SIZE = 200
+
+# 归档表名前缀，每月一张，如 log_archive_202401
+ARCHIVE_TABLE_PREFIX = 'log_archive_'
+
+# 归档表使用独立的元数据，不参与 db.create_all()
+archive_metadata = db.MetaData()
+
+
+def encode_cursor(created_at, log_id):
+    """将 (created_at, id) 编码为分页游标"""
+    raw = f'{created_at.isoformat()}|{log_id}'
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """解析分页游标，格式错误时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, log_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(log_id)
+    except Exception:
+        raise ValueError('无效的分页游标')
+
+
+def serialize_log(log):
+    """日志转换为字典"""
+    return {
+        'id': log.id,
+        'user_id': log.user_id,
+        'username': log.username,
+        'action': log.action,
+        'target_type': log.target_type,
+        'target_id': log.target_id,
+        'details': log.details,
+        'ip_address': log.ip_address,
+        'user_agent': log.user_agent,
+        'created_at': log.created_at.isoformat() if log.created_at else None
+    }
+
+
+def query_logs(username=None, action=None, target_type=None, target_id=None,
+               start_time=None, end_time=None, cursor=None, limit=50):
+    """按条件查询日志，按 (created_at, id) 倒序键集分页
+
+    返回 (日志列表, 下一页游标)，没有更多数据时游标为 None。
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    query = Log.query
+
+    if username:
+        query = query.filter(Log.username == username)
+    if action:
+        query = query.filter(Log.action == action)
+    if target_type:
+        query = query.filter(Log.target_type == target_type)
+    if target_id is not None:
+        query = query.filter(Log.target_id == target_id)
+    if start_time:
+        query = query.filter(Log.created_at >= start_time)
+    if end_time:
+        query = query.filter(Log.created_at < end_time)
+
+    if cursor:
+        cursor_time, cursor_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            Log.created_at < cursor_time,
+            db.and_(Log.created_at == cursor_time, Log.id < cursor_id)
+        ))
+
+    # 多取一条用于判断是否还有下一页
+    logs = query.order_by(Log.created_at.desc(), Log.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(logs) > limit:
+        logs = logs[:limit]
+        last = logs[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return logs, next_cursor
+
+
+def _month_start(value):
+    """返回所在月份的第一天零点"""
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value):
+    """返回下个月的第一天零点"""
+    if value.month == 12:
+        return value.replace(year=value.year + 1, month=1)
+    return value.replace(month=value.month + 1)
+
+
+def get_archive_table(month):
+    """获取（必要时创建）指定月份的归档表"""
+    name = f'{ARCHIVE_TABLE_PREFIX}{month.strftime("%Y%m")}'
+    table = archive_metadata.tables.get(name)
+    if table is None:
+        table = Log.__table__.to_metadata(archive_metadata, name=name)
+        # 归档表只保留主键，去掉热表上的复合索引
+        for index in list(table.indexes):
+            table.indexes.discard(index)
+    table.create(db.engine, checkfirst=True)
+    return table
+
+
+def list_archive_tables():
+    """列出已存在的归档表"""
+    names = db.inspect(db.engine).get_table_names()
+    return sorted(name for name in names if name.startswith(ARCHIVE_TABLE_PREFIX))
+
+
+def rollover_logs(retention_days=90, now=None):
+    """将超过保留期的日志按月移动到归档表
+
+    每个月份在一个事务中先 INSERT ... SELECT 再 DELETE，热表只保留
+    最近 retention_days 天的日志。返回每张归档表移动的行数。
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    columns = [column.name for column in Log.__table__.columns]
+    moved = {}
+
+    while True:
+        # 已移动的行会从热表删除，每次取剩余最早的日志，跳过没有日志的月份，
+        # 只为实际有日志的月份创建归档表
+        oldest = db.session.query(db.func.min(Log.created_at)).filter(Log.created_at < cutoff).scalar()
+        if not oldest:
+            break
+
+        month = _month_start(oldest)
+        month_end = min(_next_month(month), cutoff)
+        archive = get_archive_table(month)
+        condition = db.and_(Log.created_at >= month, Log.created_at < month_end)
+
+        try:
+            select_stmt = db.select(*[Log.__table__.c[name] for name in columns]).where(condition)
+            db.session.execute(archive.insert().from_select(columns, select_stmt))
+            result = db.session.execute(Log.__table__.delete().where(condition))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if result.rowcount:
+            moved[archive.name] = moved.get(archive.name, 0) + result.rowcount
+
+    return moved
@@ -0,0 +1,195 @@
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import defaultdict
+from flask import Response, g, request, has_request_context
+from sqlalchemy import event
+
+# 请求耗时直方图的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ThreadStats:
+    """单个线程的统计数据，只由所属线程写入，采集时汇总"""
+
+    def __init__(self):
+        self.requests = defaultdict(int)  # (endpoint, method, status) -> 次数
+        self.latency_buckets = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+        self.latency_sum = defaultdict(float)
+        self.db_queries = defaultdict(int)
+        self.db_time = defaultdict(float)
+        self.in_flight = 0
+
+
+def _merge(total, stats):
+    """把 stats 的计数累加到 total"""
+    for key, value in list(stats.requests.items()):
+        total.requests[key] += value
+    for endpoint, counts in list(stats.latency_buckets.items()):
+        buckets = total.latency_buckets[endpoint]
+        for i, count in enumerate(counts):
+            buckets[i] += count
+    for endpoint, value in list(stats.latency_sum.items()):
+        total.latency_sum[endpoint] += value
+    for endpoint, value in list(stats.db_queries.items()):
+        total.db_queries[endpoint] += value
+    for endpoint, value in list(stats.db_time.items()):
+        total.db_time[endpoint] += value
+    total.in_flight += stats.in_flight
+
+
+class _ThreadToken:
+    """只保存在线程局部变量中，线程结束时随之回收，触发统计数据合并"""
+
+
+_local = threading.local()
+_all_stats = set()
+# 已结束线程的统计数据合并到这里，线程不断新建时统计对象不会无限增长
+_retired = _ThreadStats()
+# 线程结束时的合并可能在持有锁的线程中触发，使用可重入锁
+_registry_lock = threading.RLock()
+
+
+def _retire(stats):
+    with _registry_lock:
+        _all_stats.discard(stats)
+        _merge(_retired, stats)
+
+
+def _stats():
+    """获取当前线程的统计对象，首次使用时注册"""
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+        stats = _ThreadStats()
+        _local.stats = stats
+        _local.token = _ThreadToken()
+        weakref.finalize(_local.token, _retire, stats)
+        with _registry_lock:
+            _all_stats.add(stats)
+    return stats
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.db_queries = 0
+    g.db_time = 0.0
+    _stats().in_flight += 1
+
+
+def _after_request(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def _teardown_request(exc):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    endpoint = request.endpoint or 'unmatched'
+    status = g.pop('metrics_status', 500)
+
+    stats = _stats()
+    stats.in_flight -= 1
+    stats.requests[(endpoint, request.method, status)] += 1
+    stats.latency_buckets[endpoint][bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+    stats.latency_sum[endpoint] += elapsed
+    stats.db_queries[endpoint] += g.get('db_queries', 0)
+    stats.db_time[endpoint] += g.get('db_time', 0.0)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info['query_start'].pop()
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_time += time.perf_counter() - start
+
+
+def instrument_engine(engine):
+    """为数据库引擎注册查询计数和计时事件"""
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_metrics():
+    """汇总各线程的统计数据，生成 Prometheus 文本格式"""
+    total = _ThreadStats()
+    with _registry_lock:
+        _merge(total, _retired)
+        for stats in _all_stats:
+            _merge(total, stats)
+    requests = total.requests
+    buckets = total.latency_buckets
+    latency_sum = total.latency_sum
+    db_queries = total.db_queries
+    db_time = total.db_time
+    in_flight = total.in_flight
+
+    lines = [
+        '# HELP http_requests_total Total HTTP requests by endpoint, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    for (endpoint, method, status), value in sorted(requests.items()):
+        lines.append(f'http_requests_total{{endpoint="{_label(endpoint)}",method="{method}",status="{status}"}} {value}')
+
+    lines += [
+        '# HELP http_request_duration_seconds HTTP request latency by endpoint.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    for endpoint in sorted(buckets):
+        label = _label(endpoint)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), buckets[endpoint]):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {cumulative}')
+        lines.append(f'http_request_duration_seconds_sum{{endpoint="{label}"}} {latency_sum[endpoint]:.6f}')
+        lines.append(f'http_request_duration_seconds_count{{endpoint="{label}"}} {cumulative}')
+
+    lines += [
+        '# HELP http_requests_in_flight HTTP requests currently being processed.',
+        '# TYPE http_requests_in_flight gauge',
+        f'http_requests_in_flight {in_flight}',
+        '# HELP db_queries_total Database queries executed by endpoint.',
+        '# TYPE db_queries_total counter',
+    ]
+    for endpoint, value in sorted(db_queries.items()):
+        lines.append(f'db_queries_total{{endpoint="{_label(endpoint)}"}} {value}')
+
+    lines += [
+        '# HELP db_query_duration_seconds_total Time spent in database queries by endpoint.',
+        '# TYPE db_query_duration_seconds_total counter',
+    ]
+    for endpoint, value in sorted(db_time.items()):
+        lines.append(f'db_query_duration_seconds_total{{endpoint="{_label(endpoint)}"}} {value:.6f}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def init_metrics(app, db):
+    """注册请求统计钩子、数据库事件和 /api/metrics 接口
+
+    统计数据按线程分别记录，写入时无需加锁，采集时再汇总；线程结束后
+    其数据合并到共享的汇总中。多进程部署时每个进程分别统计。
+    """
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            instrument_engine(engine)
+
+    # 指标接口（Prometheus 文本格式）
+    @app.route('/api/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,173 @@
+from collections import defaultdict
+from datetime import datetime
+from extensions import db
+from models import Notification, NotificationCounter
+from utils.settings import settings
+
+# 单页最大条数
+MAX_PAGE_SIZE = 100
+
+# 摘要通知中最多列出的申请编号
+DIGEST_MAX_IDS = 10
+
+# 需要通知申请人的申请状态
+REQUEST_STATUS_TEXT = {
+    'approved': '已批准',
+    'rejected': '已拒绝',
+    'returned': '已归还',
+    'partially_returned': '已部分归还',
+}
+
+
+def _increment_unread(counts):
+    """按用户增加未读计数，counts 为 {用户名: 增量}"""
+    table = NotificationCounter.__table__
+    for username, delta in counts.items():
+        result = db.session.execute(
+            table.update()
+            .where(table.c.username == username)
+            .values(unread=table.c.unread + delta)
+        )
+        if result.rowcount == 0:
+            # 计数行不存在时按实际未读数初始化（已包含本次插入的通知）
+            _rebuild_counter(username)
+
+
+def _rebuild_counter(username):
+    """按实际未读通知数重建计数行，返回未读数"""
+    unread = Notification.query.filter_by(username=username, is_read=False).count()
+    counter = NotificationCounter.query.get(username)
+    if counter:
+        counter.unread = unread
+    else:
+        db.session.add(NotificationCounter(username=username, unread=unread))
+    return unread
+
+
+def notify_users(notifications):
+    """批量写入通知并维护未读计数，不提交事务
+
+    notifications 为字典列表，字段同 Notification 模型。
+    """
+    if not notifications:
+        return 0
+    if not settings.get('notification_enabled', True):
+        return 0
+
+    now = datetime.utcnow()
+    rows = []
+    counts = defaultdict(int)
+    for notification in notifications:
+        rows.append({
+            'user_id': notification.get('user_id'),
+            'username': notification['username'],
+            'title': notification['title'],
+            'content': notification['content'],
+            'type': notification.get('type', 'system'),
+            'is_read': False,
+            'created_at': now
+        })
+        counts[notification['username']] += 1
+
+    db.session.execute(Notification.__table__.insert(), rows)
+    _increment_unread(counts)
+    return len(rows)
+
+
+def notify_request_changes(requests):
+    """申请状态变化时通知申请人，不提交事务
+
+    同一用户同一状态的多条变化合并为一条摘要通知，批量审批500条申请
+    也只为每个用户生成一条通知。
+    """
+    groups = defaultdict(list)
+    for req in requests:
+        if req.status in REQUEST_STATUS_TEXT:
+            groups[(req.username, req.status)].append(req)
+
+    notifications = []
+    for (username, status), reqs in groups.items():
+        text = REQUEST_STATUS_TEXT[status]
+        title = f'申请{text}'
+        if len(reqs) == 1:
+            req = reqs[0]
+            content = f'您申请的 {req.item_name or req.item_id} × {req.quantity}（申请编号 {req.id}）{text}'
+            if req.comment:
+                content += f'，备注：{req.comment}'
+        else:
+            ids = '、'.join(str(req.id) for req in reqs[:DIGEST_MAX_IDS])
+            more = ' 等' if len(reqs) > DIGEST_MAX_IDS else ''
+            content = f'您有 {len(reqs)} 个申请{text}，申请编号：{ids}{more}'
+        notifications.append({
+            'username': username,
+            'title': title,
+            'content': content,
+            'type': 'request'
+        })
+
+    return notify_users(notifications)
+
+
+def get_unread_count(username):
+    """读取用户未读通知数（单行主键查询）"""
+    counter = NotificationCounter.query.get(username)
+    if counter is not None:
+        return counter.unread
+    unread = _rebuild_counter(username)
+    db.session.commit()
+    return unread
+
+
+def list_notifications(username, before_id=None, unread_only=False, limit=20):
+    """按ID倒序键集分页查询通知，返回 (通知列表, 下一页起点ID)"""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    query = Notification.query.filter(Notification.username == username)
+    if unread_only:
+        query = query.filter(Notification.is_read.is_(False))
+    if before_id:
+        query = query.filter(Notification.id < before_id)
+
+    notifications = query.order_by(Notification.id.desc()).limit(limit + 1).all()
+    next_before_id = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        next_before_id = notifications[-1].id
+    return notifications, next_before_id
+
+
+def mark_read(username, ids=None):
+    """批量标记已读：一条UPDATE更新通知，一条UPDATE调整计数，返回标记条数
+
+    ids 为空时将该用户全部通知标记为已读。
+    """
+    table = Notification.__table__
+    stmt = table.update().where(table.c.username == username, table.c.is_read.is_(False))
+    if ids:
+        stmt = stmt.where(table.c.id.in_(ids))
+
+    try:
+        updated = db.session.execute(stmt.values(is_read=True)).rowcount
+        if updated:
+            counter = NotificationCounter.__table__
+            db.session.execute(
+                counter.update()
+                .where(counter.c.username == username)
+                .values(unread=db.case((counter.c.unread > updated, counter.c.unread - updated), else_=0))
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return updated
+
+
+def serialize_notification(notification):
+    """通知转换为字典"""
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'content': notification.content,
+        'type': notification.type,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None
+    }
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import threading
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+
+class HashingOverloaded(Exception):
+    """密码哈希队列已满，调用方应返回503"""
+    pass
+
+
+# 进程池按进程ID创建，避免多进程服务器fork后共用父进程的池
+_executor = None
+_executor_pid = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def _mp_context():
+    """哈希进程由 forkserver 启动，不从已有线程和数据库连接的服务进程直接 fork"""
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def _get_executor():
+    """获取当前进程的哈希进程池，工作进程数为0时返回None（同步执行）"""
+    global _executor, _executor_pid, _slots
+    workers = current_app.config['PASSWORD_HASH_WORKERS']
+    if workers <= 0:
+        return None, None
+
+    pid = os.getpid()
+    if _executor is None or _executor_pid != pid:
+        with _executor_lock:
+            if _executor is None or _executor_pid != pid:
+                _executor = ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context())
+                _executor_pid = pid
+                _slots = threading.BoundedSemaphore(current_app.config['PASSWORD_HASH_MAX_PENDING'])
+    return _executor, _slots
+
+
+def _run(func, *args):
+    """在进程池中执行哈希计算，排队数超过上限时立即失败"""
+    executor, slots = _get_executor()
+    if executor is None:
+        return func(*args)
+
+    if not slots.acquire(timeout=current_app.config['PASSWORD_HASH_QUEUE_TIMEOUT']):
+        raise HashingOverloaded('系统繁忙，请稍后重试')
+    try:
+        return executor.submit(func, *args).result()
+    finally:
+        slots.release()
+
+
+def hash_password(password):
+    """使用配置的算法和迭代次数生成密码哈希"""
+    return _run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def hash_passwords(passwords):
+    """并行生成一批密码哈希，整批只占用一个排队名额"""
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    executor, slots = _get_executor()
+    if executor is None:
+        return [generate_password_hash(password, method) for password in passwords]
+
+    if not slots.acquire(timeout=current_app.config['PASSWORD_HASH_QUEUE_TIMEOUT']):
+        raise HashingOverloaded('系统繁忙，请稍后重试')
+    try:
+        chunksize = max(1, len(passwords) // (current_app.config['PASSWORD_HASH_WORKERS'] * 4))
+        return list(executor.map(generate_password_hash, passwords, repeat(method), chunksize=chunksize))
+    finally:
+        slots.release()
+
+
+def verify_password(password_hash, password):
+    """校验密码"""
+    return _run(check_password_hash, password_hash, password)
+
+
+def normalize_method(method):
+    """补全算法的默认参数，得到 generate_password_hash 写入哈希中的方法字符串
+
+    例如 pbkdf2:sha256 补全为 pbkdf2:sha256:600000，scrypt 补全为 scrypt:32768:8:1。
+    """
+    name, *args = method.split(':')
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    return method
+
+
+def needs_rehash(password_hash):
+    """哈希参数与当前配置不一致时返回True"""
+    method = password_hash.split('$', 1)[0]
+    return method != normalize_method(current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def shutdown():
+    """关闭进程池"""
+    global _executor
+    if _executor is not None and _executor_pid == os.getpid():
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
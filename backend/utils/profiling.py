@@ -0,0 +1,148 @@
+import cProfile
+import io
+import itertools
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from auth import get_session_principal
+
+# 请求头：管理员携带该请求头时对本次请求进行性能分析
+PROFILE_HEADER = 'X-Profile'
+
+# 每份分析结果保留的函数数和SQL条数
+TOP_FUNCTIONS = 30
+TOP_QUERIES = 20
+
+_profiles = deque(maxlen=50)
+_profiles_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+
+
+def _should_profile(app):
+    """请求头由管理员触发，或按采样率随机抽样"""
+    if request.headers.get(PROFILE_HEADER) == '1':
+        principal = get_session_principal()
+        if principal and principal.role == 'admin':
+            return True
+    rate = app.config['PROFILING_SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+
+def _top_functions(profiler):
+    """按累计耗时排序，提取耗时最多的函数"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats('cumulative')
+    result = []
+    for func in stats.fcn_list[:TOP_FUNCTIONS]:
+        primitive_calls, total_calls, total_time, cumulative_time, _ = stats.stats[func]
+        filename, lineno, name = func
+        result.append({
+            'function': f'{filename}:{lineno}({name})',
+            'calls': total_calls,
+            'total_time': round(total_time, 6),
+            'cumulative_time': round(cumulative_time, 6)
+        })
+    return result
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile_sql' in g:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile_sql' in g and conn.info.get('profile_query_start'):
+        elapsed = time.perf_counter() - conn.info['profile_query_start'].pop()
+        g.profile_sql.append((elapsed, statement))
+
+
+def get_profiles():
+    """最近的分析结果摘要，按时间倒序"""
+    with _profiles_lock:
+        profiles = list(_profiles)
+    return [
+        {key: profile[key] for key in ('id', 'method', 'path', 'endpoint', 'status', 'duration', 'query_count', 'created_at')}
+        for profile in reversed(profiles)
+    ]
+
+
+def get_profile(profile_id):
+    """获取单份分析结果详情"""
+    with _profiles_lock:
+        for profile in _profiles:
+            if profile['id'] == profile_id:
+                return profile
+    return None
+
+
+def init_profiling(app, db):
+    """注册按需性能分析钩子
+
+    只有 PROFILING_ENABLED 为真时才会调用，关闭时不注册任何钩子，
+    没有额外开销。被选中的请求用 cProfile 包裹，并记录每条SQL耗时。
+    """
+    global _profiles
+    _profiles = deque(maxlen=app.config['PROFILING_KEEP'])
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_profiling():
+        if not _should_profile(app):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # 其他线程正在分析（同一时间只能有一个分析器）
+            return None
+        g.profiler = profiler
+        g.profile_start = time.perf_counter()
+        g.profile_sql = []
+        return None
+
+    @app.after_request
+    def finish_profiling(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        duration = time.perf_counter() - g.pop('profile_start')
+        queries = sorted(g.pop('profile_sql', []), key=lambda query: query[0], reverse=True)
+
+        profile = {
+            'id': next(_profile_ids),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration': round(duration, 6),
+            'query_count': len(queries),
+            'query_time': round(sum(query[0] for query in queries), 6),
+            'created_at': datetime.utcnow().isoformat(),
+            'functions': _top_functions(profiler),
+            'queries': [
+                {'duration': round(elapsed, 6), 'statement': statement}
+                for elapsed, statement in queries[:TOP_QUERIES]
+            ]
+        }
+        with _profiles_lock:
+            _profiles.append(profile)
+
+        response.headers['X-Profile-Id'] = str(profile['id'])
+        return response
+
+    @app.teardown_request
+    def abort_profiling(exc):
+        # 请求异常时 after_request 不会执行，确保分析器被关闭
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
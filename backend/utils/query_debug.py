@@ -0,0 +1,99 @@
+import os
+import re
+import traceback
+from collections import defaultdict
+from flask import g, request, has_request_context
+from sqlalchemy import event
+
+# 应用代码所在目录，用于从调用栈中找出发起查询的业务代码位置
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THIS_FILE = os.path.abspath(__file__)
+
+_IN_LIST = re.compile(r'IN\s*\((?:\s*(?:\?|%\(\w+\)s|:\w+|\d+)\s*,?)+\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACES = re.compile(r'\s+')
+
+
+def normalize_statement(statement):
+    """归一化SQL：合并空白、字面量替换为占位符、IN 列表合并为一个"""
+    statement = _STRING.sub('?', statement)
+    statement = _NUMBER.sub('?', statement)
+    statement = _IN_LIST.sub('IN (?)', statement)
+    return _SPACES.sub(' ', statement).strip()
+
+
+def _caller_location():
+    """返回调用栈中最近的业务代码位置（文件:行号 函数名）"""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename == THIS_FILE or not filename.startswith(APP_ROOT):
+            continue
+        if 'site-packages' in filename:
+            continue
+        return f'{os.path.relpath(filename, APP_ROOT)}:{frame.lineno} {frame.name}'
+    return 'unknown'
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context() or 'query_log' not in g:
+        return
+    g.query_log.append((normalize_statement(statement), _caller_location()))
+
+
+def _before_request():
+    g.query_log = []
+
+
+def summarize_queries(query_log, threshold):
+    """按归一化语句分组，重复次数达到阈值的标记为N+1嫌疑"""
+    groups = defaultdict(lambda: {'count': 0, 'locations': defaultdict(int)})
+    for statement, location in query_log:
+        group = groups[statement]
+        group['count'] += 1
+        group['locations'][location] += 1
+
+    suspects = [
+        {
+            'statement': statement,
+            'count': group['count'],
+            'locations': dict(group['locations'])
+        }
+        for statement, group in groups.items()
+        if group['count'] >= threshold
+    ]
+    suspects.sort(key=lambda suspect: suspect['count'], reverse=True)
+    return len(groups), suspects
+
+
+def init_query_debug(app, db):
+    """开发模式下统计每个请求的SQL查询并检测N+1
+
+    响应增加 X-Query-Count 请求头；同一语句执行次数达到
+    QUERY_DEBUG_N1_THRESHOLD 时记录警告日志及调用位置。
+    """
+    threshold = app.config['QUERY_DEBUG_N1_THRESHOLD']
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.before_request(_before_request)
+
+    @app.after_request
+    def report_queries(response):
+        query_log = g.pop('query_log', None)
+        if query_log is None:
+            return response
+
+        response.headers['X-Query-Count'] = str(len(query_log))
+        distinct, suspects = summarize_queries(query_log, threshold)
+        app.logger.debug(f'{request.method} {request.path}: {len(query_log)} 次查询，{distinct} 种语句')
+
+        for suspect in suspects:
+            locations = '; '.join(f'{location} ×{count}' for location, count in suspect['locations'].items())
+            app.logger.warning(
+                f'疑似N+1查询 {request.method} {request.path}: 执行 {suspect["count"]} 次 '
+                f'[{suspect["statement"][:200]}] 位置: {locations}'
+            )
+        return response
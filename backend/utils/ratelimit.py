@@ -0,0 +1,196 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from flask import current_app, jsonify, request, session
+from auth import get_session_principal
+from utils.settings import settings
+
+# 限流规则：capacity 为桶容量（允许的突发请求数），rate 为每秒补充的令牌数
+Rule = namedtuple('Rule', ['limit', 'capacity', 'rate'])
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+# 未单独配置的 /api 接口使用该规则（不配置则不限流）
+DEFAULT_RULE_KEY = 'default'
+
+
+def parse_rate(value):
+    """解析 "次数/周期" 格式的限流规则，如 "60/minute"，格式错误时抛出 ValueError"""
+    try:
+        count, period = str(value).split('/', 1)
+        count = int(count)
+        seconds = PERIODS[period.strip().lower()]
+    except (ValueError, KeyError):
+        raise ValueError(f'无效的限流规则: {value}')
+    if count <= 0:
+        raise ValueError(f'无效的限流规则: {value}')
+    return Rule(str(value), count, count / seconds)
+
+
+def _refill(tokens, updated_at, rule, now):
+    """按经过的时间补充令牌，并尝试取出一个
+
+    返回 (剩余令牌数, 需要等待的秒数)，等待秒数为 0 表示放行。
+    """
+    tokens = min(rule.capacity, tokens + max(0.0, now - updated_at) * rule.rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rule.rate
+
+
+class MemoryBackend:
+    """进程内令牌桶，多进程部署时每个进程分别计数"""
+
+    # 桶数量超过该值时清理已经补满的桶
+    MAX_BUCKETS = 100000
+    # 最长周期为一小时，超过该时间没有请求的桶一定已经补满
+    IDLE_SECONDS = 3600
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, rule):
+        now = time.time()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (rule.capacity, now))
+            tokens, wait = _refill(tokens, updated_at, rule, now)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._prune(now)
+        return wait
+
+    def _prune(self, now):
+        # 已补满的桶删除后与新建的桶等价
+        self._buckets = {
+            key: value for key, value in self._buckets.items()
+            if now - value[1] < self.IDLE_SECONDS
+        }
+
+
+class SQLiteBackend:
+    """基于本机SQLite文件的令牌桶，同一台机器上的多个工作进程共享计数"""
+
+    # 每处理多少次请求清理一次长时间未使用的桶
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limit_bucket ('
+            'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # 自动提交模式，事务由 BEGIN IMMEDIATE 显式控制
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def take(self, key, rule):
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated_at FROM rate_limit_bucket WHERE key = ?', (key,)).fetchone()
+            tokens, updated_at = row if row else (rule.capacity, now)
+            tokens, wait = _refill(tokens, updated_at, rule, now)
+            conn.execute(
+                'INSERT INTO rate_limit_bucket (key, tokens, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at',
+                (key, tokens, now)
+            )
+            self._takes += 1
+            if self._takes % self.PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM rate_limit_bucket WHERE updated_at < ?', (now - MemoryBackend.IDLE_SECONDS,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class RateLimiter:
+    """按接口限流，规则来自系统设置 rate_limits，可在线修改"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._raw_rules = None
+        self._rules = {}
+
+    def rules(self):
+        """解析当前限流规则，设置未变化时复用上次的结果"""
+        raw = settings.get('rate_limits') or {}
+        if raw is not self._raw_rules:
+            rules = {}
+            for endpoint, value in raw.items():
+                try:
+                    rules[endpoint] = parse_rate(value)
+                except ValueError as e:
+                    current_app.logger.warning(f'忽略限流规则 {endpoint}: {str(e)}')
+            self._rules = rules
+            self._raw_rules = raw
+        return self._rules
+
+    def rule_for(self, endpoint):
+        rules = self.rules()
+        rule = rules.get(endpoint)
+        if rule is None and request.path.startswith('/api/'):
+            rule = rules.get(DEFAULT_RULE_KEY)
+        return rule
+
+    def check(self):
+        """请求前检查，超过限制时返回 429 响应"""
+        if request.method == 'OPTIONS':
+            return None
+        rule = self.rule_for(request.endpoint)
+        if rule is None:
+            return None
+
+        # 登录用户按用户计数，未登录按IP计数；管理员不受限制
+        identity = f'ip:{request.remote_addr}'
+        if 'username' in session:
+            principal = get_session_principal()
+            if principal and principal.role == 'admin':
+                return None
+            if principal:
+                identity = f'user:{principal.id}'
+
+        wait = self.backend.take(f'{request.endpoint}|{identity}', rule)
+        if wait <= 0:
+            return None
+
+        response = jsonify({
+            'code': 429,
+            'message': '请求过于频繁，请稍后再试'
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(math.ceil(wait))
+        response.headers['X-RateLimit-Limit'] = rule.limit
+        return response
+
+
+def init_rate_limit(app):
+    """注册限流检查
+
+    RATE_LIMIT_BACKEND 为 memory 时每个进程单独计数；为 sqlite 时使用
+    RATE_LIMIT_STORAGE 指定的本地文件，同一台机器上的工作进程共享计数。
+    """
+    if app.config['RATE_LIMIT_BACKEND'] == 'sqlite':
+        backend = SQLiteBackend(app.config['RATE_LIMIT_STORAGE'])
+    else:
+        backend = MemoryBackend()
+    limiter = RateLimiter(backend)
+    app.before_request(limiter.check)
+    return limiter
@@ -0,0 +1,43 @@
+from functools import wraps
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+
+# 只读副本在 SQLALCHEMY_BINDS 中的键名
+REPLICA_BIND_KEY = 'replica'
+
+
+class RoutingSession(Session):
+    """读写分离的会话
+
+    被 read_only 标记的接口中，查询发送到只读副本；刷新（写入）和
+    未标记的接口仍使用主库。没有配置副本时与默认会话相同。
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('use_read_replica'):
+            engine = self._db.engines.get(REPLICA_BIND_KEY)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(f):
+    """只读接口装饰器：查询路由到只读副本"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.use_read_replica = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def build_engine_options(config):
+    """根据数据库类型生成连接池配置，SQLite使用SQLAlchemy默认值"""
+    if config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': True,
+    }
@@ -0,0 +1,55 @@
+from models import Item, ItemCategory, Request
+
+# 各模型对外输出的字段；日期时间字段保持 datetime，由 JSON 序列化统一转换
+ITEM_FIELDS = (
+    'id', 'name', 'category', 'total', 'in_stock', 'min_stock', 'low_stock', 'description',
+    'created_at', 'updated_at'
+)
+CATEGORY_FIELDS = ('id', 'name', 'description', 'default_min_stock')
+REQUEST_FIELDS = (
+    'id', 'username', 'item_id', 'item_name', 'item_category', 'quantity', 'purpose', 'status',
+    'created_at', 'approved_at', 'approver', 'comment', 'returned_quantity', 'returned_at'
+)
+
+
+def to_dict(obj, fields):
+    """按字段列表把模型对象转换为字典"""
+    return {field: getattr(obj, field) for field in fields}
+
+
+def serialize_item(item):
+    return to_dict(item, ITEM_FIELDS)
+
+
+def serialize_category(category):
+    return to_dict(category, CATEGORY_FIELDS)
+
+
+def serialize_request(req):
+    return to_dict(req, REQUEST_FIELDS)
+
+
+def select_rows(query, model, fields):
+    """只查询需要的列，返回查询结果行
+
+    结果行由 JSON 序列化直接输出为对象，列表接口不必构造 ORM 对象
+    再逐个转换为字典。
+    """
+    return query.with_entities(*(getattr(model, field) for field in fields)).all()
+
+
+def iter_rows(query, model, fields, batch_size=1000):
+    """逐批读取指定列，用于导出大量数据时限制内存占用"""
+    return query.with_entities(*(getattr(model, field) for field in fields)).yield_per(batch_size)
+
+
+def item_rows(query):
+    return select_rows(query, Item, ITEM_FIELDS)
+
+
+def category_rows(query):
+    return select_rows(query, ItemCategory, CATEGORY_FIELDS)
+
+
+def request_rows(query):
+    return select_rows(query, Request, REQUEST_FIELDS)
@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+from types import MappingProxyType
+from extensions import db
+from models import SystemConfig
+
+# 已知配置项：键 -> (默认值, 类型)
+DEFAULT_SETTINGS = {
+    'system_name': ('仓库管理系统', str),
+    'version': ('1.0.0', str),
+    'max_borrow_days': (14, int),
+    'auto_approve_threshold': (1, int),
+    'notification_enabled': (True, bool),
+    'maintenance_mode': (False, bool),
+    # 接口限流规则：接口名 -> "次数/周期"，周期为 second、minute 或 hour
+    'rate_limits': ({
+        'items.get_items': '120/minute',
+        'items.get_item_statistics': '20/minute',
+        'admin.get_statistics': '20/minute',
+        'admin.export_data': '5/minute',
+        'admin.dump_data': '2/minute',
+        'users.get_user_statistics': '20/minute',
+    }, dict),
+}
+
+# 保存配置版本号的内部键，每次更新加一，用于通知其他进程重新加载
+VERSION_KEY = '_settings_version'
+
+
+def _parse_bool(value):
+    """解析布尔值配置"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _parse_dict(value):
+    """解析以JSON对象保存的配置"""
+    if isinstance(value, str):
+        value = json.loads(value)
+    if not isinstance(value, dict):
+        raise ValueError('配置值必须是JSON对象')
+    return value
+
+
+def parse_value(key, value):
+    """按配置项类型转换值，无法转换时抛出 ValueError"""
+    if key not in DEFAULT_SETTINGS:
+        return str(value)
+    value_type = DEFAULT_SETTINGS[key][1]
+    if value_type is bool:
+        return _parse_bool(value)
+    if value_type is dict:
+        return _parse_dict(value)
+    return value_type(value)
+
+
+def format_value(value):
+    """将配置值转换为数据库中保存的字符串"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class SettingsCache:
+    """SystemConfig 的进程内只读快照
+
+    读取时直接返回内存中的快照，不访问数据库；每隔 check_interval 秒
+    最多检查一次版本号，版本号变化（其他进程更新了配置）时重新加载。
+    """
+
+    def __init__(self, check_interval=5.0):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def _read_version(self):
+        row = SystemConfig.query.filter_by(key=VERSION_KEY).first()
+        return int(row.value) if row else 0
+
+    def _load(self):
+        """从数据库加载全部配置，生成新的快照"""
+        values = {key: default for key, (default, _) in DEFAULT_SETTINGS.items()}
+        version = 0
+        for row in SystemConfig.query.all():
+            if row.key == VERSION_KEY:
+                version = int(row.value)
+                continue
+            try:
+                values[row.key] = parse_value(row.key, row.value)
+            except ValueError:
+                # 数据库中的非法值保留默认值
+                continue
+        self._snapshot = MappingProxyType(values)
+        self._version = version
+        self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if self._snapshot is not None and now - self._checked_at < self.check_interval:
+                return
+            if self._snapshot is None or self._read_version() != self._version:
+                self._load()
+            else:
+                self._checked_at = now
+
+    def snapshot(self):
+        """返回当前配置快照（只读映射）"""
+        self._ensure_fresh()
+        return self._snapshot
+
+    def get(self, key, default=None):
+        """读取单个配置项"""
+        return self.snapshot().get(key, default)
+
+    def update(self, data):
+        """保存配置并递增版本号，返回更新后的快照
+
+        只接受 DEFAULT_SETTINGS 中的配置项，其他键抛出 ValueError。
+        """
+        unknown = [key for key in data if key not in DEFAULT_SETTINGS]
+        if unknown:
+            raise ValueError(f'未知的设置项: {", ".join(unknown)}')
+        parsed = {key: parse_value(key, value) for key, value in data.items()}
+
+        try:
+            rows = {row.key: row for row in SystemConfig.query.filter(SystemConfig.key.in_(list(parsed) + [VERSION_KEY])).all()}
+            for key, value in parsed.items():
+                if key in rows:
+                    rows[key].value = format_value(value)
+                else:
+                    db.session.add(SystemConfig(key=key, value=format_value(value)))
+
+            version_row = rows.get(VERSION_KEY)
+            if version_row:
+                version_row.value = str(int(version_row.value) + 1)
+            else:
+                db.session.add(SystemConfig(key=VERSION_KEY, value='1', description='配置版本号'))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        with self._lock:
+            self._load()
+        return self._snapshot
+
+    def invalidate(self):
+        """丢弃本进程的快照，下次读取时重新加载"""
+        with self._lock:
+            self._snapshot = None
+
+
+settings = SettingsCache()
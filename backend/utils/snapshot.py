@@ -0,0 +1,163 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from utils.tools import ensure_directory, format_file_size
+
+# 非 WAL 模式下每一步复制的页数，步与步之间释放源库的读锁，写操作不会被整个备份阻塞
+BACKUP_PAGES_PER_STEP = 256
+
+# 每一步之间的休眠时间（秒），给写操作留出时间
+BACKUP_STEP_SLEEP = 0.005
+
+# 分步复制期间其他连接写入源库会使备份从头开始，超过该次数时放弃
+BACKUP_MAX_RESTARTS = 5
+
+SNAPSHOT_PREFIX = 'warehouse_'
+SNAPSHOT_SUFFIX = '.db'
+
+# 同一进程内同时只允许一个备份任务
+_snapshot_lock = threading.Lock()
+
+
+def get_sqlite_path(engine):
+    """返回SQLite数据库文件路径，非SQLite数据库时抛出 ValueError"""
+    url = engine.url
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise ValueError('在线快照仅支持基于文件的SQLite数据库')
+    return url.database
+
+
+def check_integrity(path):
+    """对数据库文件执行完整性检查，返回 (是否通过, 检查结果)"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        rows = conn.execute('PRAGMA integrity_check').fetchall()
+    finally:
+        conn.close()
+    messages = [row[0] for row in rows]
+    return messages == ['ok'], messages
+
+
+def create_snapshot(engine, snapshot_dir, keep=7):
+    """使用SQLite在线备份API创建快照
+
+    WAL 模式下一次复制完成：备份只持有读快照，不阻塞写操作，也不会因
+    写入而重新开始。其他模式按 BACKUP_PAGES_PER_STEP 分步复制，期间其他
+    连接仍可写入，但每次写入都会使备份重新开始，重新开始超过
+    BACKUP_MAX_RESTARTS 次时放弃并抛出 RuntimeError。
+    复制完成后执行完整性检查，未通过的快照会被删除。
+    成功后按 keep 清理旧快照，返回快照信息。
+    """
+    source_path = get_sqlite_path(engine)
+    ensure_directory(snapshot_dir)
+
+    if not _snapshot_lock.acquire(blocking=False):
+        raise RuntimeError('已有备份任务正在进行')
+
+    try:
+        name = f'{SNAPSHOT_PREFIX}{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}{SNAPSHOT_SUFFIX}'
+        target_path = os.path.join(snapshot_dir, name)
+        partial_path = target_path + '.part'
+        started = time.monotonic()
+
+        try:
+            _copy_database(source_path, partial_path)
+        except Exception:
+            os.remove(partial_path)
+            raise
+
+        ok, messages = check_integrity(partial_path)
+        if not ok:
+            os.remove(partial_path)
+            raise RuntimeError(f'快照完整性检查失败: {"; ".join(messages[:5])}')
+
+        os.replace(partial_path, target_path)
+        removed = prune_snapshots(snapshot_dir, keep)
+
+        info = _snapshot_info(target_path)
+        info['duration'] = round(time.monotonic() - started, 3)
+        info['removed'] = removed
+        return info
+    finally:
+        _snapshot_lock.release()
+
+
+def _copy_database(source_path, target_path):
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        if source.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal':
+            source.backup(target, pages=-1)
+        else:
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=_restart_guard(),
+                          sleep=BACKUP_STEP_SLEEP)
+    finally:
+        target.close()
+        source.close()
+
+
+def _restart_guard():
+    """分步备份的进度回调：剩余页数回升说明备份重新开始，次数过多时中止"""
+    state = {'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > BACKUP_MAX_RESTARTS:
+                raise RuntimeError('备份期间数据库持续被写入，快照未完成，请稍后重试')
+        state['remaining'] = remaining
+
+    return progress
+
+
+def _snapshot_info(path):
+    stat = os.stat(path)
+    return {
+        'name': os.path.basename(path),
+        'size': stat.st_size,
+        'size_text': format_file_size(stat.st_size),
+        'created_at': datetime.utcfromtimestamp(stat.st_mtime).isoformat()
+    }
+
+
+def list_snapshots(snapshot_dir):
+    """按时间倒序列出快照"""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    names = [
+        name for name in os.listdir(snapshot_dir)
+        if name.startswith(SNAPSHOT_PREFIX) and name.endswith(SNAPSHOT_SUFFIX)
+    ]
+    return [_snapshot_info(os.path.join(snapshot_dir, name)) for name in sorted(names, reverse=True)]
+
+
+def prune_snapshots(snapshot_dir, keep):
+    """只保留最新的 keep 个快照，返回被删除的快照名"""
+    removed = []
+    for info in list_snapshots(snapshot_dir)[keep:]:
+        os.remove(os.path.join(snapshot_dir, info['name']))
+        removed.append(info['name'])
+    return removed
+
+
+def start_snapshot_scheduler(app, db):
+    """按 SNAPSHOT_INTERVAL_HOURS 定期创建快照的后台线程，间隔为0时不启动"""
+    interval = app.config['SNAPSHOT_INTERVAL_HOURS'] * 3600
+    if interval <= 0:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                with app.app_context():
+                    info = create_snapshot(db.engine, app.config['SNAPSHOT_DIR'], app.config['SNAPSHOT_KEEP'])
+                app.logger.info(f'定时快照完成: {info["name"]}')
+            except Exception as e:
+                app.logger.error(f'定时快照失败: {str(e)}')
+
+    thread = threading.Thread(target=run, name='snapshot-scheduler', daemon=True)
+    thread.start()
+    return thread
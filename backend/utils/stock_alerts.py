@@ -0,0 +1,158 @@
+from sqlalchemy import event
+from extensions import db
+from models import Item, ItemCategory, User
+from utils.events import publish_low_stock_event
+from utils.notifications import notify_users
+
+# 会话中等待提交后推送的低库存状态变化
+PENDING_KEY = 'stock_alerts'
+READY_KEY = 'stock_alert_events'
+
+
+def parse_min_stock(value):
+    """解析请求中的最低库存，空值返回 None
+
+    JSON 和 Excel 导入的值可能是字符串，统一转换为整数；不是非负整数时
+    抛出 ValueError。
+    """
+    if value is None or value == '':
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('最低库存必须是非负整数')
+    if value < 0:
+        raise ValueError('最低库存必须是非负整数')
+    return value
+
+
+def category_min_stock(category_name):
+    """分类的默认最低库存，分类不存在时为 0"""
+    value = db.session.query(ItemCategory.default_min_stock).filter(ItemCategory.name == category_name).scalar()
+    return value or 0
+
+
+def effective_min_stock(item):
+    """物品的最低库存：物品单独设置的值优先，否则使用分类默认值"""
+    if item.min_stock is not None:
+        return item.min_stock
+    return category_min_stock(item.category)
+
+
+def is_low(in_stock, min_stock):
+    return min_stock > 0 and in_stock < min_stock
+
+
+def _alert_data(item, min_stock):
+    return {
+        'id': item.id,
+        'name': item.name,
+        'category': item.category,
+        'in_stock': item.in_stock,
+        'min_stock': min_stock,
+        'low_stock': item.low_stock
+    }
+
+
+def _notify_admins(items):
+    """通知所有启用的管理员，items 为 [(物品, 最低库存)]，不提交事务"""
+    if not items:
+        return
+    if len(items) == 1:
+        item, min_stock = items[0]
+        content = f'物品「{item.name}」当前库存 {item.in_stock}，低于最低库存 {min_stock}'
+    else:
+        names = '、'.join(item.name for item, _ in items[:10])
+        more = f' 等 {len(items)} 个物品' if len(items) > 10 else ''
+        content = f'以下物品库存低于最低库存：{names}{more}'
+    admins = db.session.query(User.username).filter(User.role == 'admin', User.is_active.is_(True)).all()
+    notify_users([{
+        'username': username,
+        'title': '库存不足提醒',
+        'content': content,
+        'type': 'stock'
+    } for username, in admins])
+
+
+def check_stock_level(item, min_stock=None):
+    """库存或最低库存变化后调用，在提交事务之前
+
+    只比较这一个物品的库存和最低库存，不扫描全表。低库存状态变化时更新
+    item.low_stock；新变为低库存时通知管理员（随当前事务提交），事务提交
+    后再向管理员推送状态变化事件。返回状态是否变化。
+    """
+    if min_stock is None:
+        min_stock = effective_min_stock(item)
+    low = is_low(item.in_stock, min_stock)
+    if low == bool(item.low_stock):
+        return False
+
+    item.low_stock = low
+    if low:
+        _notify_admins([(item, min_stock)])
+    db.session.info.setdefault(PENDING_KEY, []).append((item, min_stock))
+    return True
+
+
+def refresh_category(category):
+    """分类默认最低库存变化后，重新计算使用默认值的物品，不提交事务
+
+    使用两条 UPDATE 按条件批量设置标记，只有状态变化的物品才会被更新；
+    新变为低库存的物品合并为一条通知。返回状态变化的物品数。
+    """
+    threshold = category.default_min_stock or 0
+    uses_default = db.and_(Item.category == category.name, Item.min_stock.is_(None))
+    should_be_low = Item.in_stock < threshold if threshold > 0 else db.false()
+
+    newly_low = Item.query.filter(uses_default, Item.low_stock.is_(False), should_be_low).all()
+    recovered = Item.query.filter(uses_default, Item.low_stock.is_(True), db.not_(should_be_low)).all()
+    for item in newly_low:
+        item.low_stock = True
+    for item in recovered:
+        item.low_stock = False
+
+    _notify_admins([(item, threshold) for item in newly_low])
+    db.session.info.setdefault(PENDING_KEY, []).extend((item, threshold) for item in newly_low + recovered)
+    return len(newly_low) + len(recovered)
+
+
+def rebuild_low_stock():
+    """按当前库存和最低库存重新计算全部物品的低库存标记，不发送通知
+
+    用于升级后初始化新增的列，或直接修改数据库之后。返回低库存物品数。
+    """
+    threshold = db.func.coalesce(
+        Item.min_stock,
+        db.select(ItemCategory.default_min_stock)
+        .where(ItemCategory.name == Item.category)
+        .scalar_subquery(),
+        0
+    )
+    db.session.execute(
+        db.update(Item)
+        .values(low_stock=db.and_(threshold > 0, Item.in_stock < threshold))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return Item.query.filter(Item.low_stock.is_(True)).count()
+
+
+@event.listens_for(db.session, 'before_commit')
+def _prepare_pending(session):
+    # 提交后会话不能再执行SQL，先刷新以获得新物品的ID，再生成事件内容
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        session.flush()
+        session.info[READY_KEY] = [_alert_data(item, min_stock) for item, min_stock in pending]
+
+
+@event.listens_for(db.session, 'after_commit')
+def _publish_pending(session):
+    for alert in session.info.pop(READY_KEY, []):
+        publish_low_stock_event(alert)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(READY_KEY, None)